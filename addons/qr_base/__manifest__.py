@@ -0,0 +1,38 @@
+{
+    'name': 'QR Base',
+    'version': '19.0.1.0.0',
+    'category': 'Hidden',
+    'summary': 'Shared QR code helpers for the sale and BOPIS QR modules',
+    'description': """
+        QR Base
+        =======
+
+        Technical module shared by the QR addons:
+        - HMAC-signed, self-verifying QR tokens with key rotation
+        - Lazy /qr/image/<token>.png route with a per-worker render cache
+        - Pluggable renderers: Pillow PNG, direct zlib PNG and SVG
+        - qr.token.mixin: one code per document (issue, render, verify,
+          one-shot redeem) shared by the sale and BOPIS addons
+        - Append-only QR event log (issue, render, email, scan, reject,
+          redeem) with a time-bucketed statistics API
+        - Per-worker stage histograms and counters at /qr/metrics
+          (Prometheus text format), optional per-request profiling
+        - Resumable bulk re-issue / re-render runs (after a domain move
+          or a token leak)
+    """,
+    'author': 'Nguyên Khang',
+    'depends': ['base_setup'],
+    'external_dependencies': {
+        'python': ['qrcode'],
+    },
+    'data': [
+        'security/ir.model.access.csv',
+        'views/res_config_settings_views.xml',
+        'views/qr_reissue_run_views.xml',
+        'data/ir_cron_data.xml',
+    ],
+    'installable': True,
+    'application': False,
+    'auto_install': False,
+    'license': 'LGPL-3',
+}
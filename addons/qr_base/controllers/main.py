@@ -0,0 +1,62 @@
+import hashlib
+import time
+from odoo import http  # type: ignore
+from odoo.http import request  # type: ignore
+from odoo.addons.qr_base.tools import (  # type: ignore
+    RENDERERS, render_qr, get_renderer, image_cache, metrics, span, incr, profiling,
+    RENDER_GENERATION_PARAM,
+)
+
+# the image of a token only changes when its payload does (e.g. web.base.url)
+CACHE_CONTROL = 'private, max-age=86400'
+
+
+class QrImageController(http.Controller):
+
+    @http.route(['/qr/image/<string:token>.png', '/qr/image/<string:token>.svg'],
+                type='http', auth='public', methods=['GET'], csrf=False, sitemap=False)
+    def qr_image(self, token, **kwargs):
+        """Render the QR image of a token on first request and serve it cacheable."""
+        renderer = get_renderer(request.env)
+        if request.httprequest.path.endswith('.svg'):
+            renderer = 'svg'
+        elif RENDERERS[renderer].extension != 'png':
+            renderer = 'png'
+
+        generation = request.env['ir.config_parameter'].sudo().get_param(RENDER_GENERATION_PARAM, '0')
+        cache_key = (token, renderer, generation)
+        cached = image_cache.get(cache_key)
+        incr('qr_image_cache_total', result='miss' if cached is None else 'hit')
+        if cached is None:
+            start = time.perf_counter()
+            with profiling(request.env, f'/qr/image {renderer}'):
+                resolved = request.env['qr.image'].sudo()._resolve_image(token)
+                if not resolved:
+                    request.env['qr.event'].sudo()._log('render', outcome='not_found')
+                    return request.not_found()
+                payload, options = resolved
+                etag = hashlib.sha256(f"{renderer}|{payload}|{sorted(options.items())}".encode()).hexdigest()[:32]
+                with span('image_render', renderer=renderer):
+                    cached = (render_qr(payload, renderer=renderer, **options), etag)
+            image_cache.put(cache_key, *cached)
+            request.env['qr.event'].sudo()._log(
+                'render', latency_ms=(time.perf_counter() - start) * 1000)
+        image, etag = cached
+
+        headers = [('ETag', f'"{etag}"'), ('Cache-Control', CACHE_CONTROL)]
+        if etag in request.httprequest.if_none_match:
+            return request.make_response(b'', headers=headers, status=304)
+        return request.make_response(image, headers=headers + [
+            ('Content-Type', RENDERERS[renderer].mimetype),
+            ('Content-Length', str(len(image))),
+        ])
+
+    @http.route('/qr/metrics', type='http', auth='user', methods=['GET'], csrf=False, sitemap=False)
+    def qr_metrics(self, **kwargs):
+        """Stage histograms and counters of this worker, in Prometheus text format (admins only)."""
+        if not request.env.user.has_group('base.group_system'):
+            return request.make_response('Forbidden', headers=[('Content-Type', 'text/plain')], status=403)
+        return request.make_response(metrics.render(), headers=[
+            ('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+            ('Cache-Control', 'no-store'),
+        ])
@@ -0,0 +1,7 @@
+from . import qr_event
+from . import qr_image
+from . import qr_token
+from . import qr_token_signer
+from . import qr_token_mixin
+from . import qr_reissue_run
+from . import res_config_settings
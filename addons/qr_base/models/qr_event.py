@@ -0,0 +1,115 @@
+from datetime import timedelta
+from odoo import models, fields, api  # type: ignore
+
+EVENT_TYPES = [
+    ('issue', 'Issue'),
+    ('render', 'Render'),
+    ('email', 'Email'),
+    ('scan', 'Scan'),
+    ('reject', 'Reject'),
+    ('redeem', 'Redeem'),
+]
+BUCKETS = ('minute', 'hour', 'day', 'week', 'month')
+RETENTION_PARAM = 'qr_base.event_retention_days'
+
+
+class QrEvent(models.Model):
+    """Append-only log of QR lifecycle events, for analytics.
+
+    Events are buffered on the transaction and written with one multi-row
+    INSERT right before it commits; events of a rolled back transaction are
+    dropped with it.
+    """
+    _name = 'qr.event'
+    _description = 'QR Event'
+    _order = 'id desc'
+    _log_access = False
+
+    event_type = fields.Selection(EVENT_TYPES, required=True, readonly=True)
+    res_model = fields.Char(string='Document Model', readonly=True)
+    res_id = fields.Many2oneReference(string='Document', model_field='res_model', readonly=True)
+    outcome = fields.Char(readonly=True, help='ok, or the error code of a scan, email or render')
+    latency_ms = fields.Float(string='Latency (ms)', readonly=True)
+    created_at = fields.Datetime(required=True, readonly=True)
+
+    def init(self):
+        # rows are appended in time order: a BRIN index stays tiny
+        self.env.cr.execute(f"""
+            CREATE INDEX IF NOT EXISTS {self._table}_created_at_brin
+                ON {self._table} USING brin (created_at)
+        """)
+
+    @api.model
+    def _log(self, event_type, records=None, outcome='ok', latency_ms=None, **values):
+        """Buffer one event per record of ``records`` (or a single event without
+        document), inserted in bulk when the transaction commits."""
+        rows = self.env.cr.precommit.data.setdefault('qr.event', [])
+        if not rows:
+            self.env.cr.precommit.add(self._flush_events)
+        base = dict(values, event_type=event_type, outcome=outcome, latency_ms=latency_ms,
+                    created_at=fields.Datetime.now())
+        for record in records if records is not None else [None]:
+            row = dict(base)
+            if record:
+                row.update(res_model=record._name, res_id=record.id, **self._event_values(record))
+            rows.append(row)
+
+    @api.model
+    def _event_values(self, record):
+        """Extra column values of an event about ``record``, extended by the QR addons."""
+        return {}
+
+    def _flush_events(self):
+        rows = self.env.cr.precommit.data.pop('qr.event', [])
+        if not rows:
+            return
+        columns = sorted({key for row in rows for key in row if key in self._fields})
+        self.env.cr.execute(
+            f"INSERT INTO {self._table} ({', '.join(columns)}) VALUES {', '.join(['%s'] * len(rows))}",
+            [tuple(row.get(column) for column in columns) for row in rows],
+        )
+
+    @api.model
+    def get_stats(self, bucket='hour', date_from=None, date_to=None, event_types=None):
+        """Event counts and latency per time bucket, event type and outcome.
+
+        ``bucket`` is one of minute, hour, day, week or month. Returns a list
+        of dicts ordered by bucket start.
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket {bucket!r}, expected one of {', '.join(BUCKETS)}")
+        self.check_access('read')
+        conditions, params = ['TRUE'], [bucket]
+        if date_from:
+            conditions.append('created_at >= %s')
+            params.append(fields.Datetime.to_datetime(date_from))
+        if date_to:
+            conditions.append('created_at < %s')
+            params.append(fields.Datetime.to_datetime(date_to))
+        if event_types:
+            conditions.append('event_type IN %s')
+            params.append(tuple(event_types))
+        self.env.cr.execute(f"""
+            SELECT date_trunc(%s, created_at) AS bucket, event_type, outcome, count(*),
+                   avg(latency_ms), percentile_cont(0.95) WITHIN GROUP (ORDER BY latency_ms)
+              FROM {self._table}
+             WHERE {' AND '.join(conditions)}
+          GROUP BY 1, 2, 3
+          ORDER BY 1, 2, 3
+        """, params)
+        return [{
+            'bucket': start,
+            'event_type': event_type,
+            'outcome': outcome,
+            'count': count,
+            'avg_latency_ms': avg_latency,
+            'p95_latency_ms': p95_latency,
+        } for start, event_type, outcome, count, avg_latency, p95_latency in self.env.cr.fetchall()]
+
+    @api.model
+    def _cron_purge(self):
+        """Delete events older than ``qr_base.event_retention_days`` (90 by default)."""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(RETENTION_PARAM, 90))
+        self.env.cr.execute(f"DELETE FROM {self._table} WHERE created_at < %s",
+                            [fields.Datetime.now() - timedelta(days=days)])
+        self.invalidate_model()
@@ -0,0 +1,26 @@
+from odoo import models, api  # type: ignore
+from odoo.addons.qr_base.tools import TokenError, is_signed_token, verify_token  # type: ignore
+
+
+class QrImage(models.AbstractModel):
+    _name = 'qr.image'
+    _description = 'QR Image Resolver'
+
+    @api.model
+    def _resolve_image(self, token):
+        """Return ``(payload, render options)`` for the document owning ``token``,
+        or None. Tokens of every ``qr.token.mixin`` model are resolved with one
+        registry lookup; an override may resolve other tokens and fall back to
+        super().
+        """
+        if is_signed_token(token):
+            try:
+                verify_token(token, self.env['qr.token.signer']._get_keys()[0])
+            except TokenError:
+                return None
+        res_model, res_id, status = self.env['qr.token']._lookup([token]).get(token, (None, None, None))
+        if status in ('live', 'used'):
+            record = self.env[res_model].browse(res_id).exists()
+            if record:
+                return record._qr_image_payload()
+        return None
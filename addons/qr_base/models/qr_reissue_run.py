@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+import traceback
+from odoo import models, fields, api  # type: ignore
+from odoo.exceptions import UserError  # type: ignore
+from odoo.tools.safe_eval import safe_eval  # type: ignore
+from odoo.addons.qr_base.tools import RENDER_GENERATION_PARAM  # type: ignore
+
+_logger = logging.getLogger(__name__)
+
+
+class QrReissueRun(models.Model):
+    """Bulk re-issue or re-render of the QR codes of a domain of documents.
+
+    The run walks the domain in id order, one chunk per transaction
+    (keyset pagination on ``last_id``, no OFFSET), and commits its cursor
+    with each chunk: after a worker restart the cron resumes where the last
+    committed chunk stopped. ``throttle`` seconds are slept between chunks.
+    """
+    _name = 'qr.reissue.run'
+    _description = 'QR Bulk Re-issue'
+    _order = 'id desc'
+
+    name = fields.Char(required=True, default='QR re-issue')
+    model = fields.Selection(
+        selection='_selection_model',
+        string='Documents',
+        required=True)
+    domain = fields.Char(
+        default='[]',
+        required=True,
+        help='Documents to process, on top of the open documents carrying a code.')
+    mode = fields.Selection([
+        ('reissue', 'Re-issue (new tokens)'),
+        ('rerender', 'Re-render (same tokens)'),
+    ], required=True, default='rerender',
+        help='Re-issue revokes the current codes, e.g. after a token leak. Re-render keeps them and '
+             'drops stored and cached images, e.g. after a web.base.url change.')
+    send_email = fields.Boolean(
+        string='Send the codes again',
+        help='Queue the follow-up email of every processed document.')
+    chunk_size = fields.Integer(default=200, required=True)
+    throttle = fields.Float(
+        string='Pause between chunks (s)',
+        default=0.5,
+        help='Leaves room for the regular traffic between two chunks.')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('running', 'Running'),
+        ('paused', 'Paused'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='draft', required=True, readonly=True, index=True)
+    last_id = fields.Integer(string='Last Processed ID', readonly=True, default=0)
+    processed = fields.Integer(readonly=True)
+    total = fields.Integer(string='Total (at start)', readonly=True)
+    started_at = fields.Datetime(readonly=True)
+    finished_at = fields.Datetime(readonly=True)
+    error = fields.Text(readonly=True)
+
+    @api.model
+    def _selection_model(self):
+        return [(model, self.env['ir.model']._get(model).name) for model in self.env['qr.token']._qr_models()]
+
+    def _records_domain(self):
+        self.ensure_one()
+        Model = self.env[self.model]
+        return Model._qr_open_domain() + [('qr_token', '!=', False)] + safe_eval(self.domain or '[]')
+
+    # ------------------------------------------------------------------
+    # Actions
+    # ------------------------------------------------------------------
+
+    def action_start(self):
+        if any(run.mode == 'rerender' for run in self):
+            # every worker drops its render cache (cached by token and generation)
+            ICP = self.env['ir.config_parameter'].sudo()
+            ICP.set_param(RENDER_GENERATION_PARAM, str(int(ICP.get_param(RENDER_GENERATION_PARAM, '0')) + 1))
+        for run in self.filtered(lambda r: r.state == 'draft'):
+            run.write({
+                'state': 'running',
+                'started_at': fields.Datetime.now(),
+                'total': run.env[run.model].sudo().search_count(run._records_domain()),
+            })
+        self._trigger()
+
+    def action_pause(self):
+        self.filtered(lambda r: r.state == 'running').state = 'paused'
+
+    def action_resume(self):
+        self.filtered(lambda r: r.state in ('paused', 'failed')).write({'state': 'running', 'error': False})
+        self._trigger()
+
+    def _trigger(self):
+        self.env.ref('qr_base.ir_cron_qr_reissue_run').sudo()._trigger()
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _cron_process(self, max_seconds=240):
+        """Process running runs chunk by chunk, committing after each one;
+        reschedules itself when time is up and work is left."""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        deadline = time.monotonic() + max_seconds
+        for run in self.search([('state', '=', 'running')], order='id'):
+            while run.state == 'running':
+                if time.monotonic() > deadline:
+                    self._trigger()
+                    return
+                run._process_chunk()
+                if auto_commit:
+                    self.env.cr.commit()
+                if run.state == 'running' and run.throttle > 0:
+                    time.sleep(run.throttle)
+                # pick up a pause requested from another worker
+                run.invalidate_recordset(['state'])
+
+    def _process_chunk(self):
+        """Process the next chunk of documents after ``last_id``."""
+        self.ensure_one()
+        Model = self.env[self.model].sudo()
+        records = Model.search(self._records_domain() + [('id', '>', self.last_id)],
+                               order='id', limit=max(self.chunk_size, 1))
+        if not records:
+            self.write({'state': 'done', 'finished_at': fields.Datetime.now()})
+            return
+        try:
+            with self.env.cr.savepoint():
+                if self.mode == 'reissue':
+                    # _qr_after_issue queues the emails unless told not to
+                    records.with_context(qr_no_email=not self.send_email)._qr_issue()
+                else:
+                    records._qr_discard_images()
+                    if self.send_email:
+                        records._qr_resend()
+        except Exception:
+            _logger.exception("QR re-issue run %s failed after id %s", self.id, self.last_id)
+            self.write({'state': 'failed', 'error': traceback.format_exc(limit=5)})
+            return
+        self.write({'last_id': records[-1].id, 'processed': self.processed + len(records)})
+
+    def write(self, vals):
+        if 'domain' in vals or 'model' in vals or 'mode' in vals:
+            if any(run.state != 'draft' for run in self):
+                raise UserError('A started run cannot change what it processes.')
+        return super().write(vals)
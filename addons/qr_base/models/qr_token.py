@@ -0,0 +1,253 @@
+import hashlib
+import threading
+from datetime import timedelta
+from odoo import models, fields, api  # type: ignore
+from odoo.addons.qr_base.tools import image_cache  # type: ignore
+
+PURGE_CHUNK_PARAM = 'qr_base.purge_chunk_size'
+# days a redeemed, retired or expired token stays in the registry to tell it apart from a forged one
+RETENTION_PARAM = 'qr_base.token_retention_days'
+
+
+def token_hash(token):
+    """Hex SHA-256 of a token: the registry never stores tokens themselves."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class QrToken(models.Model):
+    """Registry of every QR token issued for a ``qr.token.mixin`` document.
+
+    Verification resolves a token here with one lookup on a partial unique
+    index that only covers live tokens (not redeemed, not retired by a
+    re-issue or an expiry purge), so the hot index stays small however much
+    history accumulates. Failed lookups fall back to the full history to
+    tell used and expired tokens apart from unknown ones.
+    """
+    _name = 'qr.token'
+    _description = 'QR Token Registry'
+    _order = 'id desc'
+    _log_access = False
+    _rec_name = 'token_hash'
+
+    token_hash = fields.Char(required=True, readonly=True, index=True)
+    res_model = fields.Char(string='Document Model', required=True, readonly=True)
+    res_id = fields.Many2oneReference(string='Document', model_field='res_model', required=True, readonly=True)
+    issued_at = fields.Datetime(readonly=True)
+    expires_at = fields.Datetime(readonly=True)
+    used_at = fields.Datetime(readonly=True)
+    live = fields.Boolean(default=True, readonly=True)
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS {self._table}_live_hash_uniq
+                ON {self._table} (token_hash) WHERE live
+        """)
+        self.env.cr.execute(f"""
+            CREATE INDEX IF NOT EXISTS {self._table}_live_document_idx
+                ON {self._table} (res_model, res_id) WHERE live
+        """)
+        self.env.cr.execute(f"""
+            CREATE INDEX IF NOT EXISTS {self._table}_live_expiry_idx
+                ON {self._table} (expires_at) WHERE live AND expires_at IS NOT NULL
+        """)
+
+    @api.model
+    def _allocate(self, records, generate, expires_at=None, max_attempts=5):
+        """Reserve one token per record of ``records`` and retire the ones they replace.
+
+        ``generate(records)`` returns candidate tokens in record order. They
+        are inserted in one statement with ``ON CONFLICT DO NOTHING`` on the
+        live-token unique index: a collision is reported by the index itself,
+        with no search per candidate and no race window, and only colliding
+        records get new candidates. Returns the tokens in record order.
+        """
+        if not records:
+            return []
+        self.env.cr.execute(f"""
+            UPDATE {self._table} SET live = FALSE
+             WHERE res_model = %s AND res_id IN %s AND live
+        """, [records._name, tuple(records.ids)])
+        now = fields.Datetime.now()
+        tokens, pending = {}, records
+        for _attempt in range(max_attempts):
+            candidates = dict(zip(pending.ids, generate(pending)))
+            self.env.cr.execute(f"""
+                INSERT INTO {self._table} (token_hash, res_model, res_id, issued_at, expires_at, live)
+                VALUES {', '.join(['%s'] * len(candidates))}
+                ON CONFLICT (token_hash) WHERE live DO NOTHING
+             RETURNING res_id
+            """, [(token_hash(token), records._name, res_id, now, expires_at, True)
+                  for res_id, token in candidates.items()])
+            allocated = {row[0] for row in self.env.cr.fetchall()}
+            tokens.update((res_id, candidates[res_id]) for res_id in allocated)
+            pending = pending.filtered(lambda r: r.id not in allocated)
+            if not pending:
+                return [tokens[record.id] for record in records]
+        raise ValueError(f"Could not allocate unique QR tokens for {pending}")
+
+    @api.model
+    def _lookup(self, tokens, model=None):
+        """Resolve tokens to ``{token: (res_model, res_id, status)}``.
+
+        ``status`` is ``live``, ``used`` or ``expired``; unknown and retired
+        tokens are left out. Live tokens take one indexed lookup for the
+        whole batch.
+        """
+        hashes = {token_hash(token): token for token in tokens}
+        if not hashes:
+            return {}
+        model_clause = 'AND res_model = %s' if model else ''
+        params = [tuple(hashes)] + ([model] if model else [])
+        self.env.cr.execute(f"""
+            SELECT token_hash, res_model, res_id, expires_at, NULL
+              FROM {self._table}
+             WHERE token_hash IN %s AND live {model_clause}
+        """, params)
+        rows = self.env.cr.fetchall()
+        missing = set(hashes) - {row[0] for row in rows}
+        if missing:
+            # cold path, only for tokens that are not live any more
+            self.env.cr.execute(f"""
+                SELECT DISTINCT ON (token_hash) token_hash, res_model, res_id, expires_at, used_at
+                  FROM {self._table}
+                 WHERE token_hash IN %s {model_clause}
+              ORDER BY token_hash, id DESC
+            """, [tuple(missing)] + params[1:])
+            rows += self.env.cr.fetchall()
+
+        now = fields.Datetime.now()
+        found = {}
+        for digest, res_model, res_id, expires_at, used_at in rows:
+            if used_at:
+                status = 'used'
+            elif expires_at and expires_at <= now:
+                status = 'expired'
+            elif digest in missing:
+                continue  # retired by a re-issue
+            else:
+                status = 'live'
+            found[hashes[digest]] = (res_model, res_id, status)
+        return found
+
+    @api.model
+    def _mark_used(self, records, used_at):
+        """Take the live tokens of ``records`` out of the hot index."""
+        if records:
+            self.env.cr.execute(f"""
+                UPDATE {self._table} SET used_at = %s, live = FALSE
+                 WHERE res_model = %s AND res_id IN %s AND live
+            """, [used_at, records._name, tuple(records.ids)])
+
+    @api.model
+    def _mark_unused(self, records):
+        """Put the current tokens of ``records`` back in the hot index (claim undone)."""
+        hashes = tuple(token_hash(token) for token in records.mapped('qr_token'))
+        if hashes:
+            self.env.cr.execute(f"""
+                UPDATE {self._table} SET used_at = NULL, live = TRUE
+                 WHERE res_model = %s AND token_hash IN %s AND NOT live
+            """, [records._name, hashes])
+
+    @api.model
+    def _backfill(self, model):
+        """Register the tokens already stored on ``model`` (used by migrations)."""
+        table = self.env[model]._table
+        self.env.cr.execute(f"""
+            INSERT INTO {self._table} (token_hash, res_model, res_id, issued_at, expires_at, used_at, live)
+            SELECT digest, %s, id, qr_issued_at, qr_expires_at, qr_used_at, qr_used_at IS NULL
+              FROM (SELECT encode(sha256(convert_to(qr_token, 'UTF8')), 'hex') AS digest, *
+                      FROM {table} WHERE qr_token IS NOT NULL) doc
+             WHERE NOT EXISTS (SELECT 1 FROM {self._table} t WHERE t.token_hash = doc.digest)
+        """, [model])
+        return self.env.cr.rowcount
+
+    # ------------------------------------------------------------------
+    # Expiry purge
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _cron_purge_expired(self, max_chunks=50):
+        """Clear expired codes and shrink the registry in chunks of
+        ``qr_base.purge_chunk_size`` rows, committing after each chunk so no
+        lock is held for long; reschedules itself when work is left.
+        """
+        chunk_size = int(self.env['ir.config_parameter'].sudo().get_param(PURGE_CHUNK_PARAM, 1000))
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        steps = [self._purge_expired_documents(model) for model in self._qr_models()]
+        steps += [self._retire_expired, self._delete_history]
+        chunks = 0
+        for step in steps:
+            while chunks < max_chunks:
+                done = step(chunk_size)
+                chunks += 1
+                if auto_commit:
+                    self.env.cr.commit()
+                if done < chunk_size:
+                    break
+            else:
+                self.env.ref('qr_base.ir_cron_qr_token_purge')._trigger()
+                return
+
+    @api.model
+    def _qr_models(self):
+        """Concrete models that inherit qr.token.mixin."""
+        return [name for name in self.env.registry.descendants(['qr.token.mixin'], '_inherit')
+                if not self.env[name]._abstract and self.env[name]._auto]
+
+    @api.model
+    def _purge_expired_documents(self, model):
+        """Step clearing up to ``limit`` expired, unredeemed codes of ``model``:
+        token, legacy image attachment and render cache, then
+        ``_qr_after_purge`` on the records. Rows locked by a running
+        transaction are left for the next chunk."""
+        Model = self.env[model]
+
+        def step(limit):
+            self.env.cr.execute(f"""
+                SELECT id, qr_token FROM {Model._table}
+                 WHERE qr_expires_at <= %s AND qr_token IS NOT NULL AND qr_used_at IS NULL
+              ORDER BY qr_expires_at
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [fields.Datetime.now(), limit])
+            rows = self.env.cr.fetchall()
+            if not rows:
+                return 0
+            ids = tuple(row[0] for row in rows)
+            # unlink only marks the files for the filestore garbage collector
+            self.env['ir.attachment'].sudo().search([
+                ('res_model', '=', model), ('res_field', '=', 'qr_code'), ('res_id', 'in', ids),
+            ]).unlink()
+            self.env.cr.execute(f"UPDATE {Model._table} SET qr_token = NULL WHERE id IN %s", [ids])
+            Model.invalidate_model(['qr_token', 'qr_code'])
+            Model.browse(ids)._qr_after_purge()
+            for _id, token in rows:
+                image_cache.discard_token(token)
+            return len(rows)
+        return step
+
+    @api.model
+    def _retire_expired(self, limit):
+        """Take up to ``limit`` expired tokens out of the live index. They
+        stay in the history, so a late scan still reads ``expired``."""
+        self.env.cr.execute(f"""
+            UPDATE {self._table} SET live = FALSE
+             WHERE id IN (SELECT id FROM {self._table}
+                           WHERE live AND expires_at <= %s
+                           LIMIT %s
+                             FOR UPDATE SKIP LOCKED)
+        """, [fields.Datetime.now(), limit])
+        return self.env.cr.rowcount
+
+    @api.model
+    def _delete_history(self, limit):
+        """Delete up to ``limit`` non-live rows older than ``qr_base.token_retention_days``."""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(RETENTION_PARAM, 365))
+        self.env.cr.execute(f"""
+            DELETE FROM {self._table}
+             WHERE id IN (SELECT id FROM {self._table}
+                           WHERE NOT live AND COALESCE(used_at, expires_at, issued_at) < %s
+                           LIMIT %s
+                             FOR UPDATE SKIP LOCKED)
+        """, [fields.Datetime.now() - timedelta(days=days), limit])
+        return self.env.cr.rowcount
@@ -0,0 +1,262 @@
+import json
+from collections import defaultdict
+from datetime import timedelta
+from odoo import models, fields, api  # type: ignore
+from odoo.addons.qr_base.tools import (  # type: ignore
+    TokenError, RENDERERS, get_renderer, image_cache, verify_token, claim_once, span,
+    encode_payload,
+)
+
+# hours a new code stays valid when the document does not say otherwise (0: never expires)
+TTL_PARAM = 'qr_base.ttl_hours'
+
+
+class QrTokenMixin(models.AbstractModel):
+    """One QR code per document: token issue, lazy render, lookup and one-shot redemption.
+
+    Every model inheriting the mixin is resolved by /qr/image through
+    ``qr.image``. The ``_qr_*`` hooks decide which records get a code, what the
+    code encodes and what redeeming it does.
+    """
+    _name = 'qr.token.mixin'
+    _description = 'QR Token Mixin'
+
+    qr_token = fields.Char(
+        string='QR Token',
+        index=True,
+        copy=False,
+        readonly=True,
+        size=128,
+        help='Signed token (version 2) or legacy random token (version 1).')
+    qr_issued_at = fields.Datetime(
+        string='Issued At',
+        index=True,
+        copy=False,
+        readonly=True)
+    qr_expires_at = fields.Datetime(
+        string='Expires At',
+        help='When this token stops being valid.',
+        index=True,
+        copy=False,
+        readonly=True)
+    qr_used_at = fields.Datetime(
+        string='Used At',
+        help='Set when token is redeemed (null until used).',
+        index=True,
+        copy=False,
+        readonly=True)
+    qr_version = fields.Integer(
+        string='QR Version',
+        default=1,
+        copy=False,
+        help='Token/format version')
+    qr_code = fields.Binary(
+        string='QR Code',
+        attachment=True,
+        readonly=True,
+        copy=False,
+        help='Legacy stored QR image. New codes are rendered on demand by /qr/image/<token>.png')
+    qr_image_url = fields.Char(
+        string='QR Image URL',
+        compute='_compute_qr_image_url')
+
+    _sql_constraints = [
+        ('unique_qr_token', 'unique(qr_token)', 'QR token must be unique.'),
+    ]
+
+    @api.depends('qr_token')
+    def _compute_qr_image_url(self):
+        extension = RENDERERS[get_renderer(self.env)].extension
+        for record in self:
+            record.qr_image_url = f"/qr/image/{record.qr_token}.{extension}" if record.qr_token else False
+
+    # ------------------------------------------------------------------
+    # Issue
+    # ------------------------------------------------------------------
+
+    def _qr_wants_token(self):
+        """Whether this record should carry a QR code."""
+        self.ensure_one()
+        return True
+
+    def _qr_issue_missing(self):
+        """Issue codes for the records that want one and do not have one yet."""
+        return self.filtered(lambda r: not r.qr_token and r._qr_wants_token())._qr_issue()
+
+    def _qr_ttl(self):
+        """How long a new code of this record stays valid, as a timedelta,
+        or None if it never expires. Defaults to ``qr_base.ttl_hours``."""
+        self.ensure_one()
+        hours = int(self.env['ir.config_parameter'].sudo().get_param(TTL_PARAM, 0) or 0)
+        return timedelta(hours=hours) if hours > 0 else None
+
+    def _qr_issue(self, expires_at=None):
+        """Issue signed codes for every record of the recordset in one pass.
+           Shared values go in one multi-record write, only the token differs.
+           No image is stored: /qr/image/<token>.png renders it on first
+           request. ``expires_at`` defaults to the TTL of each record
+           (``_qr_ttl``); pass False for codes that never expire.
+           Returns the created tokens, in record order.
+        """
+        if not self:
+            return []
+        if expires_at is None:
+            by_ttl = defaultdict(list)
+            for record in self:
+                by_ttl[record._qr_ttl()].append(record.id)
+            now = fields.Datetime.now()
+            tokens = {}
+            for ttl, ids in by_ttl.items():
+                tokens.update(zip(ids, self.browse(ids)._qr_issue(now + ttl if ttl else False)))
+            return [tokens[record.id] for record in self]
+
+        with span('issue', model=self._name):
+            # one INSERT reserves every token in the registry, its unique index
+            # rejects collisions (no search per candidate)
+            with span('token_allocation', model=self._name):
+                tokens = self.env['qr.token']._allocate(
+                    self, lambda records: records._qr_generate_tokens(expires_at), expires_at or None)
+            self.write({
+                'qr_issued_at': fields.Datetime.now(),
+                'qr_expires_at': expires_at or False,
+                'qr_used_at': False,
+                'qr_version': 2,
+            })
+            for record, token in zip(self, tokens):
+                record.qr_token = token
+            self.env['qr.event'].sudo()._log('issue', self)
+            self._qr_after_issue()
+        return tokens
+
+    def _qr_is_expired(self):
+        """Whether the current code of this record has expired."""
+        self.ensure_one()
+        return bool(self.qr_expires_at and self.qr_expires_at <= fields.Datetime.now())
+
+    def _qr_generate_tokens(self, expires_at=None):
+        """Candidate tokens for the recordset, in record order. Signed tokens
+        embed the record id, random ones (``secrets.token_urlsafe``) can be
+        returned by an override for legacy version 1 codes."""
+        return self.env['qr.token.signer']._sign(self, expires_at=expires_at)
+
+    def _qr_after_issue(self):
+        """Called on the records that just received a code."""
+        return None
+
+    def _qr_after_purge(self):
+        """Called on the records whose expired code the purge cron just cleared."""
+        return None
+
+    @api.model
+    def _qr_open_domain(self):
+        """Documents whose code can still be used, for bulk re-issue runs."""
+        return [('qr_used_at', '=', False)]
+
+    def _qr_resend(self):
+        """Send the current code to the customer again, nothing by default."""
+        return None
+
+    # ------------------------------------------------------------------
+    # Render
+    # ------------------------------------------------------------------
+
+    def _qr_payload(self):
+        """QR content of the document: the token and its issue timestamp."""
+        self.ensure_one()
+        return {
+            'qr_token': self.qr_token,
+            'qr_issued_at': fields.Datetime.to_string(self.qr_issued_at),
+        }
+
+    def _qr_image_payload(self):
+        """Return ``(payload, render options)`` of the QR image: the compact
+        ``Q1:`` payload for signed tokens, the JSON payload for legacy ones."""
+        self.ensure_one()
+        payload = encode_payload(self.qr_token, self.qr_issued_at)
+        if payload is None:
+            payload = json.dumps(self._qr_payload(), ensure_ascii=False)
+        return payload, {'error_correction': 'M'}
+
+    def _qr_discard_images(self):
+        """Drop the legacy stored image and the worker render cache, so the
+        next request renders the code again."""
+        legacy = self.filtered('qr_code')
+        if legacy:
+            legacy.qr_code = False
+        for token in self.filtered('qr_token').mapped('qr_token'):
+            image_cache.discard_token(token)
+
+    # ------------------------------------------------------------------
+    # Verify and redeem
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _qr_find(self, token):
+        """Return the record carrying ``token``, None when the token has
+        expired, an empty recordset when it is unknown. Redeemed tokens still
+        return their record so callers can tell why it cannot be used again."""
+        return self._qr_find_many([token])[token]
+
+    @api.model
+    def _qr_find_many(self, tokens):
+        """Batch version of _qr_find: ``{token: record | None}``. Forged or
+        expired signed tokens are dropped without a query, the others are
+        resolved through the qr.token registry in one lookup. An unsigned
+        token must also still be the one stored on the record: a registry row
+        left live by a migration does not redeem the document."""
+        signer = self.env['qr.token.signer']
+        keys, _kid = signer._get_keys()
+        found, lookup, unsigned = {}, [], set()
+        for token in tokens:
+            if signer._is_signed(token):
+                try:
+                    verify_token(token, keys, model=self._name)
+                except TokenError as e:
+                    found[token] = None if e.reason == 'expired' else self.browse()
+                    continue
+            else:
+                unsigned.add(token)
+            lookup.append(token)
+        with span('token_lookup', model=self._name):
+            registered = self.env['qr.token']._lookup(lookup, model=self._name)
+            existing = set(self.browse(list({res_id for _model, res_id, _status in registered.values()})).exists().ids)
+        for token in lookup:
+            _model, res_id, status = registered.get(token, (None, None, None))
+            if status == 'expired':
+                found[token] = None
+            else:
+                record = self.browse(res_id) if res_id in existing else self.browse()
+                if record and token in unsigned and record.qr_token != token:
+                    record = self.browse()
+                found[token] = record
+        return found
+
+    def _qr_claim(self):
+        """Mark the codes used with one conditional UPDATE and return the records
+        claimed; codes being redeemed concurrently are skipped right away."""
+        self.flush_recordset(['qr_used_at'])
+        now = fields.Datetime.now()
+        claimed = claim_once(self.env.cr, self._table, 'qr_used_at', self.ids, now)
+        self.invalidate_recordset(['qr_used_at'])
+        claimed = self.filtered(lambda r: r.id in claimed)
+        self.env['qr.token']._mark_used(claimed, now)
+        return claimed
+
+    def _qr_release(self):
+        """Undo a claim whose redemption failed, so the code can be scanned again."""
+        self.write({'qr_used_at': False})
+        self.env['qr.token']._mark_unused(self)
+
+    def _qr_redeem(self):
+        """Claim the codes and run _qr_on_redeem on the claimed records in one
+        savepoint: if the hook fails the claim is rolled back with it.
+        Returns the claimed records."""
+        with self.env.cr.savepoint():
+            claimed = self._qr_claim()
+            if claimed:
+                claimed._qr_on_redeem()
+        return claimed
+
+    def _qr_on_redeem(self):
+        """What redeeming the code does to the document, nothing by default."""
+        return None
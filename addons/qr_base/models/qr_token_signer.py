@@ -0,0 +1,102 @@
+import hmac
+import json
+import secrets
+from datetime import timezone
+from odoo import models, fields, api  # type: ignore
+from odoo.exceptions import UserError  # type: ignore
+from odoo.addons.qr_base.tools import TokenError, sign_token, verify_token, is_signed_token  # type: ignore
+from odoo.addons.qr_base.tools.signing import TOKEN_LENGTH, TOKEN_VERSION  # type: ignore
+
+KEYS_PARAM = 'qr_base.signing_keys'
+ACTIVE_KID_PARAM = 'qr_base.signing_kid'
+# the key id is one byte of the token, 0 is never used
+MAX_KID = 255
+
+
+class QrTokenSigner(models.AbstractModel):
+    _name = 'qr.token.signer'
+    _description = 'QR Token Signer'
+
+    @api.model
+    def _get_keys(self):
+        """Return ({kid: key bytes}, active kid), creating the first key if needed.
+
+        Keys live in ``qr_base.signing_keys`` as ``{"kid": "hex secret"}``; old
+        keys stay there after a rotation so the tokens they signed keep working.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        raw = ICP.get_param(KEYS_PARAM)
+        if not raw:
+            return self._rotate_key()
+        keys = {int(kid): bytes.fromhex(secret) for kid, secret in json.loads(raw).items()}
+        kid = int(ICP.get_param(ACTIVE_KID_PARAM) or max(keys))
+        return keys, kid
+
+    @api.model
+    def _rotate_key(self):
+        """Add a new signing key and make it the active one.
+
+        The new key takes the lowest kid that is free, or whose key no longer
+        verifies any live token (all used, expired or cleared). Raises
+        :class:`UserError` when every kid still has live tokens.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        stored = json.loads(ICP.get_param(KEYS_PARAM) or '{}')
+        busy = self._live_kids()
+        if ICP.get_param(ACTIVE_KID_PARAM):
+            busy.add(int(ICP.get_param(ACTIVE_KID_PARAM)))
+        kid = next((kid for kid in range(1, MAX_KID + 1) if kid not in busy), None)
+        if kid is None:
+            raise UserError('Every signing key id still has live QR tokens; '
+                            'purge expired codes before rotating the key again.')
+        stored[str(kid)] = secrets.token_hex(32)
+        ICP.set_param(KEYS_PARAM, json.dumps(stored))
+        ICP.set_param(ACTIVE_KID_PARAM, str(kid))
+        return {int(k): bytes.fromhex(v) for k, v in stored.items()}, kid
+
+    @api.model
+    def _live_kids(self):
+        """Key ids of the signed tokens that are not used, expired or cleared.
+
+        The kid is the second byte of the token, so it is read from the first
+        four base64url characters without decoding the whole token.
+        """
+        kids = set()
+        for model in self.env['qr.token']._qr_models():
+            Model = self.env[model]
+            Model.flush_model(['qr_token', 'qr_used_at', 'qr_expires_at'])
+            self.env.cr.execute(f"""
+                SELECT DISTINCT get_byte(head, 1)
+                  FROM (SELECT decode(translate(left(qr_token, 4), '-_', '+/'), 'base64') AS head
+                          FROM {Model._table}
+                         WHERE qr_token IS NOT NULL AND length(qr_token) = %s AND qr_used_at IS NULL
+                           AND (qr_expires_at IS NULL OR qr_expires_at > %s)) AS tokens
+                 WHERE get_byte(head, 0) = %s
+            """, [TOKEN_LENGTH, fields.Datetime.now(), TOKEN_VERSION])
+            kids.update(kid for kid, in self.env.cr.fetchall())
+        return kids
+
+    @api.model
+    def _sign(self, records, expires_at=None):
+        """Return one signed token per record, in record order."""
+        keys, kid = self._get_keys()
+        expires = int(expires_at.replace(tzinfo=timezone.utc).timestamp()) if expires_at else 0
+        return [sign_token(keys[kid], kid, records._name, record.id, expires) for record in records]
+
+    @api.model
+    def _verify(self, token, model, token_field):
+        """Return the record a signed token points to, loaded by primary key.
+
+        Raises :class:`TokenError` for forged, expired or foreign tokens, and
+        when the document no longer carries this token (re-issued or cleared).
+        """
+        keys, _kid = self._get_keys()
+        claims = verify_token(token, keys, model=model)
+        record = self.env[model].browse(claims.res_id).exists()
+        if not record or not hmac.compare_digest(record[token_field] or '', token):
+            raise TokenError('revoked')
+        return record
+
+    @api.model
+    def _is_signed(self, token):
+        return is_signed_token(token)
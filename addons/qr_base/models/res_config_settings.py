@@ -0,0 +1,25 @@
+from odoo import models, fields  # type: ignore
+from odoo.addons.qr_base.tools import RENDERER_SELECTION, DEFAULT_RENDERER  # type: ignore
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = 'res.config.settings'
+
+    qr_renderer = fields.Selection(
+        RENDERER_SELECTION,
+        string='QR Renderer',
+        default=DEFAULT_RENDERER,
+        config_parameter='qr_base.renderer',
+        help='Backend used by /qr/image to render QR codes.',
+    )
+    qr_ttl_hours = fields.Integer(
+        string='QR Validity (hours)',
+        config_parameter='qr_base.ttl_hours',
+        help='Default lifetime of new QR codes, 0 for codes that never expire. '
+             'Stores and picking types can override it.',
+    )
+    qr_profiling = fields.Boolean(
+        string='Profile QR Requests',
+        config_parameter='qr_base.profiling',
+        help='Record a profile of every QR image and verify request (Settings > Technical > Profiling).',
+    )
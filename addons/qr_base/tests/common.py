@@ -0,0 +1,141 @@
+"""Shared base of the QR performance test suites.
+
+A suite pads its tables to each ``QR_PERF_SIZES`` dataset size (default
+1000,10000,100000), then runs every hot path on a fresh batch of
+``QR_PERF_BATCH`` records (default 100), from an empty cache up to the
+final flush, counting its queries and time. The largest dataset may not run
+more queries than the smallest one, nor be much slower per record. There are
+no absolute budgets: the numbers depend on the database and the hardware, so
+they are compared against a baseline measured on the same setup.
+
+The suites are tagged ``-standard`` so a regular test run skips them::
+
+    odoo -d <db> -i qr_code,qr_private_bopis --test-tags qr_perf --stop-after-init
+
+When ``QR_PERF_REPORT`` names a directory, each suite writes
+``<module>.json`` there. When ``QR_PERF_BASELINE`` names the directory of a
+previous release's reports, an operation running more queries per record,
+or slower per record by more than ``QR_PERF_TOLERANCE`` (default 0.25),
+fails the suite. Everything is rolled back at the end.
+"""
+import json
+import os
+import time
+
+from odoo import fields, release  # type: ignore
+
+PAD_CHUNK = 5000
+# largest dataset against smallest: extra queries allowed for the same batch,
+# and factor on the time per record
+SCALE_QUERY_SLACK = 5
+SCALE_TIME_FACTOR = 3
+
+
+class QrPerfCase:
+    """Mixin of the performance suites, combined with ``TransactionCase``::
+
+        class TestPerf(QrPerfCase, TransactionCase):
+            module = 'qr_code'
+
+    It is not a test case itself, so the loader never collects it. The suite
+    implements ``_pad(size)``, which brings its tables to at least ``size``
+    rows, and ``_run_size(size)``, which measures every operation on them,
+    then calls ``_run_suite`` from its test method."""
+
+    module = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sizes = sorted(int(size) for size in os.environ.get('QR_PERF_SIZES', '1000,10000,100000').split(','))
+        cls.batch = int(os.environ.get('QR_PERF_BATCH', 100))
+        cls.results = []
+
+    def _pad_model(self, model, size, make_vals, after_create=None):
+        """Create ``make_vals()`` records of ``model`` in chunks until it has ``size`` rows."""
+        missing = size - self.env[model].search_count([])
+        while missing > 0:
+            records = self.env[model].create([make_vals() for _ in range(min(PAD_CHUNK, missing))])
+            if after_create:
+                after_create(records)
+            missing -= len(records)
+            self.env.flush_all()
+            self.env.invalidate_all()
+
+    def measure(self, size, operation, records, func):
+        """Run ``func`` from an empty cache up to the final flush and record
+        its queries and time. Returns what ``func`` returned."""
+        records = max(records, 1)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            outcome = func()
+            self.env.flush_all()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.results.append({
+                'size': size,
+                'operation': operation,
+                'records': records,
+                'queries': self.cr.sql_log_count - queries,
+                'queries_per_record': round((self.cr.sql_log_count - queries) / records, 3),
+                'ms': round(elapsed_ms, 1),
+                'ms_per_record': round(elapsed_ms / records, 3),
+            })
+        return outcome
+
+    def _run_suite(self):
+        for size in self.sizes:
+            self._pad(size)
+            self._run_size(size)
+        self._check_scaling()
+        regressions = self._write_report()
+        self.assertFalse(regressions, f"regressions against the baseline: {regressions}")
+
+    def _check_scaling(self):
+        """The same batch may not cost more queries, nor much more time, on a larger table."""
+        by_operation = {}
+        for result in self.results:
+            by_operation.setdefault(result['operation'], []).append(result)
+        for operation, results in by_operation.items():
+            smallest, largest = results[0], results[-1]
+            if smallest is largest or smallest['records'] != largest['records']:
+                continue
+            with self.subTest(operation=operation, scaling=(smallest['size'], largest['size'])):
+                self.assertLessEqual(largest['queries'], smallest['queries'] + SCALE_QUERY_SLACK)
+                self.assertLessEqual(largest['ms_per_record'], smallest['ms_per_record'] * SCALE_TIME_FACTOR + 1)
+
+    def _write_report(self):
+        """Write the JSON report and return the regressions against the baseline."""
+        regressions = []
+        baseline_dir = os.environ.get('QR_PERF_BASELINE')
+        baseline_path = baseline_dir and os.path.join(baseline_dir, f'{self.module}.json')
+        if baseline_path and os.path.exists(baseline_path):
+            tolerance = float(os.environ.get('QR_PERF_TOLERANCE', 0.25))
+            with open(baseline_path) as f:
+                baseline = {(r['size'], r['operation']): r for r in json.load(f)['results']}
+            for result in self.results:
+                before = baseline.get((result['size'], result['operation']))
+                if before and (result['queries_per_record'] > before['queries_per_record']
+                               or result['ms_per_record'] > before['ms_per_record'] * (1 + tolerance)):
+                    regressions.append({
+                        'size': result['size'],
+                        'operation': result['operation'],
+                        'queries_per_record': [before['queries_per_record'], result['queries_per_record']],
+                        'ms_per_record': [before['ms_per_record'], result['ms_per_record']],
+                    })
+        report_dir = os.environ.get('QR_PERF_REPORT')
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+            with open(os.path.join(report_dir, f'{self.module}.json'), 'w') as f:
+                json.dump({
+                    'generated_at': fields.Datetime.to_string(fields.Datetime.now()),
+                    'database': self.cr.dbname,
+                    'odoo_version': release.version,
+                    'batch': self.batch,
+                    'results': self.results,
+                    'regressions': regressions,
+                }, f, indent=2, sort_keys=True)
+        return regressions
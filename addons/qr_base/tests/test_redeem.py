@@ -0,0 +1,74 @@
+import time
+
+from odoo import fields  # type: ignore
+from odoo.modules.registry import Registry  # type: ignore
+from odoo.tests.common import BaseCase, get_db_name, tagged  # type: ignore
+from odoo.addons.qr_base.tools import claim_once  # type: ignore
+
+TABLE = 'qr_test_claim_once'
+
+
+@tagged('post_install', '-at_install')
+class TestClaimOnce(BaseCase):
+    """claim_once raced from two real cursors.
+
+    Rows written by the test transaction are invisible to other connections,
+    so the scratch table is committed in setUp and dropped on cleanup.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.registry = Registry(get_db_name())
+
+    def setUp(self):
+        super().setUp()
+        with self.registry.cursor() as cr:
+            cr.execute(f"CREATE TABLE {TABLE} (id serial PRIMARY KEY, used_at timestamp)")
+            cr.execute(f"INSERT INTO {TABLE} (used_at) VALUES (NULL), (NULL) RETURNING id")
+            self.ids = sorted(row[0] for row in cr.fetchall())
+        self.addCleanup(self._drop_table)
+
+    def _drop_table(self):
+        with self.registry.cursor() as cr:
+            cr.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+    def _claim(self, cr, ids):
+        """Claim ``ids`` on ``cr``; return the ids claimed and the seconds it took."""
+        start = time.monotonic()
+        claimed = claim_once(cr, TABLE, 'used_at', ids, fields.Datetime.now())
+        return claimed, time.monotonic() - start
+
+    def test_locked_row(self):
+        """A row claimed by an open transaction is lost at once, not waited for."""
+        with self.registry.cursor() as cr1, self.registry.cursor() as cr2:
+            self.assertEqual(self._claim(cr1, self.ids[:1])[0], {self.ids[0]})
+            claimed, elapsed = self._claim(cr2, self.ids[:1])
+            self.assertEqual(claimed, set())
+            self.assertLess(elapsed, 1)
+            # the loser's transaction is still usable
+            cr2.execute(f"SELECT count(*) FROM {TABLE}")
+            self.assertEqual(cr2.fetchone()[0], 2)
+            cr1.rollback()
+            cr2.rollback()
+
+    def test_committed_since_snapshot(self):
+        """A row claimed and committed after the loser's snapshot is lost
+        without a serialization failure."""
+        with self.registry.cursor() as cr1, self.registry.cursor() as cr2:
+            # take the snapshot of cr2 before cr1 commits
+            cr2.execute(f"SELECT count(*) FROM {TABLE} WHERE used_at IS NULL")
+            self.assertEqual(cr2.fetchone()[0], 2)
+            self.assertEqual(self._claim(cr1, self.ids[:1])[0], {self.ids[0]})
+            cr1.commit()
+            self.assertEqual(self._claim(cr2, self.ids[:1])[0], set())
+            cr2.execute("SELECT 1")
+            cr2.rollback()
+
+    def test_partly_contended(self):
+        """A multi-row claim still takes the rows nobody else holds."""
+        with self.registry.cursor() as cr1, self.registry.cursor() as cr2:
+            self.assertEqual(self._claim(cr1, self.ids[:1])[0], {self.ids[0]})
+            self.assertEqual(self._claim(cr2, self.ids)[0], {self.ids[1]})
+            cr1.rollback()
+            cr2.rollback()
@@ -0,0 +1,11 @@
+from .render import (
+    RENDERERS, RENDERER_SELECTION, DEFAULT_RENDERER,
+    render_qr, render_qr_png, get_renderer,
+)
+from .render_cache import RenderCache, image_cache, RENDER_GENERATION_PARAM
+from .signing import TokenError, SignedToken, sign_token, verify_token, is_signed_token
+from .redeem import claim_once
+from .metrics import metrics, span, incr, profiling
+from .payload import (
+    PAYLOAD_VERSION, COMPACT_PATH, encode_payload, decode_payload, compact_token, expand_token, epoch,
+)
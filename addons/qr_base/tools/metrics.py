@@ -0,0 +1,115 @@
+"""Per-worker timing histograms and counters for the QR hot paths.
+
+``span('stage')`` times a block into a fixed-bucket histogram and ``incr``
+bumps a counter. Both only take a lock and do a few additions, so they
+stay on in production. Each worker process keeps its own registry:
+/qr/metrics exposes the registry of the worker that serves the scrape,
+labelled with its pid.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# upper bounds in seconds, +Inf is implied
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_METRIC = 'qr_stage_duration_seconds'
+PROFILING_PARAM = 'qr_base.profiling'
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels):
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{%s}' % ','.join(f'{key}="{value}"' for key, value in escaped)
+
+
+class Metrics:
+    """Histograms ``{(name, labels): [bucket counts..., sum]}`` and counters ``{(name, labels): value}``"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.help = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _labels(labels))
+        index = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    def incr(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """Time the block into ``qr_stage_duration_seconds{stage=...}``, failures included"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_METRIC, time.perf_counter() - start, stage=stage, **labels)
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            histograms = {key: list(value) for key, value in self.histograms.items()}
+            counters = dict(self.counters)
+        worker = (('worker', str(os.getpid())),)
+        lines = []
+        for kind, samples in (('histogram', histograms), ('counter', counters)):
+            for name in sorted({name for name, _labels in samples}):
+                if name in self.help:
+                    lines.append(f'# HELP {name} {self.help[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+                for (sample_name, labels), value in sorted(samples.items()):
+                    if sample_name != name:
+                        continue
+                    labels = worker + labels
+                    if kind == 'counter':
+                        lines.append(f'{name}{_format_labels(labels)} {value}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + (float('inf'),), value[:-1]):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {value[-1]}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+metrics.describe(STAGE_METRIC, 'Time spent in each stage of the QR hot paths.')
+span = metrics.span
+incr = metrics.incr
+
+
+def profiling(env, description):
+    """Profiler context for one request if the ``qr_base.profiling`` parameter
+    is set (results in Settings > Technical > Profiling), a no-op otherwise."""
+    if not env['ir.config_parameter'].sudo().get_param(PROFILING_PARAM):
+        return nullcontext()
+    from odoo.tools.profiler import Profiler  # type: ignore
+    return Profiler(db=env.cr.dbname, description=description, collectors=['sql', 'traces_async'])
@@ -0,0 +1,114 @@
+"""Compact, versioned QR payloads.
+
+Version 1 of the compact format is::
+
+    Q1:<token>[:<issued at>]
+
+``token`` is the raw signed token in unpadded base32 and ``issued at`` a UTC
+epoch in seconds, packed in the same alphabet. Every character is in the QR
+alphanumeric set (uppercase, digits, ``:``/``/``), so the symbol is encoded
+at 5.5 bits per character instead of 8 and stays a few versions smaller
+than the JSON payload. URL payloads put the same token under ``/Q1/``.
+
+``decode_payload`` reads the compact format as well as the older payloads
+(JSON, ``/qr/verify/<token>`` URLs and bare tokens), so codes already
+printed keep working.
+"""
+import base64
+import binascii
+import calendar
+import json
+from datetime import datetime
+
+from .signing import TOKEN_LENGTH, _b64decode, _b64encode, is_signed_token
+
+PAYLOAD_VERSION = 'Q1'
+COMPACT_PREFIX = PAYLOAD_VERSION + ':'
+COMPACT_PATH = '/' + PAYLOAD_VERSION + '/'
+LEGACY_PATH = '/qr/verify/'
+_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'
+
+
+def _pack_int(value):
+    digits = ''
+    while True:
+        value, digit = divmod(value, 32)
+        digits = _ALPHABET[digit] + digits
+        if not value:
+            return digits
+
+
+def _unpack_int(digits):
+    value = 0
+    for char in digits.upper():
+        value = value * 32 + _ALPHABET.index(char)
+    return value
+
+
+def epoch(moment):
+    """UTC epoch in seconds of a datetime (naive datetimes are UTC, as in Odoo)."""
+    return calendar.timegm(moment.utctimetuple())
+
+
+def compact_token(token):
+    """Base32 form of a signed token, None for legacy tokens."""
+    if not is_signed_token(token):
+        return None
+    return base64.b32encode(_b64decode(token)).rstrip(b'=').decode('ascii')
+
+
+def expand_token(code):
+    """Signed token of a base32 ``code``; raises ValueError if it is not one."""
+    try:
+        raw = base64.b32decode(code + '=' * (-len(code) % 8), casefold=True)
+    except (binascii.Error, ValueError):
+        raise ValueError('malformed compact token')
+    token = _b64encode(raw)
+    if len(token) != TOKEN_LENGTH or not is_signed_token(token):
+        raise ValueError('malformed compact token')
+    return token
+
+
+def encode_payload(token, issued_at=None):
+    """``Q1:`` payload of a signed token (``issued_at``: datetime), None for legacy tokens."""
+    code = compact_token(token)
+    if code is None:
+        return None
+    if issued_at:
+        code += ':' + _pack_int(epoch(issued_at))
+    return COMPACT_PREFIX + code
+
+
+def decode_payload(data):
+    """Return ``(token, issued at epoch or None)`` from any payload format.
+
+    Raises ValueError when the payload holds no token.
+    """
+    data = (data or '').strip()
+    if data[:len(COMPACT_PREFIX)].upper() == COMPACT_PREFIX:
+        code, _sep, issued = data[len(COMPACT_PREFIX):].partition(':')
+        try:
+            return expand_token(code), _unpack_int(issued) if issued else None
+        except ValueError:
+            raise ValueError('malformed compact payload')
+    if data.startswith('{'):
+        try:
+            content = json.loads(data)
+        except json.JSONDecodeError:
+            raise ValueError('malformed JSON payload')
+        token = content.get('qr_token') if isinstance(content, dict) else None
+        if not token or not isinstance(token, str):
+            raise ValueError('no token in JSON payload')
+        issued = content.get('qr_issued_at')
+        try:
+            return token, epoch(datetime.strptime(issued, '%Y-%m-%d %H:%M:%S')) if issued else None
+        except (TypeError, ValueError):
+            raise ValueError('malformed issue date in JSON payload')
+    upper = data.upper()
+    if COMPACT_PATH in upper:
+        return expand_token(data[upper.rindex(COMPACT_PATH) + len(COMPACT_PATH):].strip('/')), None
+    if LEGACY_PATH in data:
+        data = data.split(LEGACY_PATH)[-1].strip('/')
+    if not data:
+        raise ValueError('empty payload')
+    return data, None
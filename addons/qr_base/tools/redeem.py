@@ -0,0 +1,39 @@
+"""Atomic one-shot redemption of QR codes.
+
+Reading a "used" flag and writing it later races when two scanners (or a
+double tap) redeem the same code: under Odoo's REPEATABLE READ transactions
+the loser ends in a serialization failure and the whole request is retried.
+``claim_once`` claims the rows in a single conditional UPDATE instead, and
+reports rows taken by a concurrent redemption as lost right away.
+"""
+from psycopg2 import errors
+
+
+def claim_once(cr, table, column, ids, now):
+    """Set ``column`` to ``now`` on the rows ``ids`` where it is still NULL.
+
+    Rows locked by a concurrent redemption (``NOWAIT``) or changed since the
+    transaction snapshot are not claimed, without blocking or aborting the
+    transaction. If one row of a multi-row claim is contended, the others are
+    claimed one by one. Return the set of ids claimed by this transaction.
+    """
+    ids = list(ids)
+    if not ids:
+        return set()
+    try:
+        with cr.savepoint(flush=False):
+            cr.execute(f"""
+                UPDATE {table} SET {column} = %s
+                 WHERE id IN (SELECT id FROM {table}
+                               WHERE id IN %s AND {column} IS NULL
+                                 FOR UPDATE NOWAIT)
+             RETURNING id
+            """, [now, tuple(ids)], log_exceptions=False)
+            return {row[0] for row in cr.fetchall()}
+    except (errors.LockNotAvailable, errors.SerializationFailure):
+        if len(ids) == 1:
+            return set()
+    claimed = set()
+    for res_id in ids:
+        claimed |= claim_once(cr, table, column, [res_id], now)
+    return claimed
@@ -0,0 +1,114 @@
+"""QR renderer backends.
+
+``qrcode`` and Pillow are imported on first use only, so a worker that never
+renders a QR code does not pay for them.
+
+- ``pillow``: the historical ``qrcode`` + Pillow PNG path;
+- ``png``: writes the module matrix straight to a 1-bit palette PNG with zlib;
+- ``svg``: a single ``<path>``, resolution independent.
+"""
+import struct
+import zlib
+from collections import namedtuple
+
+Renderer = namedtuple('Renderer', 'render mimetype extension')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# palette index 0 = white, 1 = black
+PNG_PALETTE = b'\xff\xff\xff\x00\x00\x00'
+
+
+def _make_qr(data, error_correction, box_size, border):
+    import qrcode  # type: ignore
+    qr = qrcode.QRCode(
+        error_correction=getattr(qrcode.constants, f'ERROR_CORRECT_{error_correction}'),
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def _render_pillow(data, error_correction, box_size, border):
+    import io
+    from qrcode.image.pil import PilImage  # type: ignore
+    img = _make_qr(data, error_correction, box_size, border).make_image(
+        image_factory=PilImage, fill_color="black", back_color="white")
+    with io.BytesIO() as buffer:
+        img.save(buffer, format="PNG")  # type: ignore
+        return buffer.getvalue()
+
+
+def _png_chunk(tag, payload):
+    chunk = tag + payload
+    return struct.pack('>I', len(payload)) + chunk + struct.pack('>I', zlib.crc32(chunk))
+
+
+def _render_png(data, error_correction, box_size, border):
+    matrix = _make_qr(data, error_correction, box_size, border).get_matrix()
+    size = len(matrix) * box_size
+    padding = '0' * (-size % 8)
+    scanlines = []
+    for row in matrix:
+        bits = ''.join('1' * box_size if module else '0' * box_size for module in row) + padding
+        # filter type 0 + packed pixels, repeated for each pixel row of the module
+        scanlines.append((b'\x00' + int(bits, 2).to_bytes(len(bits) // 8, 'big')) * box_size)
+    return b''.join((
+        PNG_SIGNATURE,
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 1, 3, 0, 0, 0)),
+        _png_chunk(b'PLTE', PNG_PALETTE),
+        _png_chunk(b'IDAT', zlib.compress(b''.join(scanlines), 9)),
+        _png_chunk(b'IEND', b''),
+    ))
+
+
+def _render_svg(data, error_correction, box_size, border):
+    matrix = _make_qr(data, error_correction, box_size, border).get_matrix()
+    modules = len(matrix)
+    # one rectangle per horizontal run of dark modules
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < modules:
+            if row[x]:
+                start = x
+                while x < modules and row[x]:
+                    x += 1
+                path.append(f'M{start},{y}h{x - start}v1h-{x - start}z')
+            x += 1
+    path = ''.join(path)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {modules} {modules}" '
+        f'width="{modules * box_size}" height="{modules * box_size}" shape-rendering="crispEdges">'
+        f'<rect width="100%" height="100%" fill="#fff"/><path d="{path}" fill="#000"/></svg>'
+    ).encode()
+
+
+RENDERERS = {
+    'pillow': Renderer(_render_pillow, 'image/png', 'png'),
+    'png': Renderer(_render_png, 'image/png', 'png'),
+    'svg': Renderer(_render_svg, 'image/svg+xml', 'svg'),
+}
+RENDERER_SELECTION = [
+    ('pillow', 'Pillow PNG'),
+    ('png', 'Direct PNG (no Pillow)'),
+    ('svg', 'SVG'),
+]
+DEFAULT_RENDERER = 'pillow'
+
+
+def render_qr(data, renderer=DEFAULT_RENDERER, error_correction='M', box_size=10, border=4):
+    """Render ``data`` as a QR code with the given backend and return the bytes."""
+    return RENDERERS[renderer].render(data, error_correction, box_size, border)
+
+
+def render_qr_png(data, error_correction='M', box_size=10, border=4):
+    """Render ``data`` as a QR code and return the PNG bytes."""
+    return render_qr(data, 'pillow', error_correction, box_size, border)
+
+
+def get_renderer(env):
+    """Renderer backend selected in the settings (``qr_base.renderer``)."""
+    renderer = env['ir.config_parameter'].sudo().get_param('qr_base.renderer', DEFAULT_RENDERER)
+    return renderer if renderer in RENDERERS else DEFAULT_RENDERER
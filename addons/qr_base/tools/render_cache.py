@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+
+# part of the cache key of /qr/image; bumping it makes every worker render again
+RENDER_GENERATION_PARAM = 'qr_base.render_generation'
+
+
+class RenderCache:
+    """Per-worker LRU of rendered QR images, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def put(self, key, image, etag):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._data[key] = (image, etag)
+            self.size += len(image)
+            while self.size > self.max_bytes and len(self._data) > 1:
+                _key, (evicted, _etag) = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def discard(self, key):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+
+    def discard_token(self, token):
+        """Drop every rendering (all backends) of ``token``."""
+        with self._lock:
+            for key in [key for key in self._data if key[0] == token]:
+                self.size -= len(self._data.pop(key)[0])
+
+
+image_cache = RenderCache()
@@ -1,2 +1 @@
 from . import models
-from . import controllers
\ No newline at end of file
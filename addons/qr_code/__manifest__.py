@@ -1,5 +1,6 @@
 {
     'name': 'Website Sale Order QR Code',
+    'version': '19.0.1.1.0',
     'category': 'Website',
     'summary': 'Generate QR codes for confirmed orders',
     'description': """
@@ -15,6 +16,7 @@
     """,
     'author': 'Nguyen Cao Hoang',
     'depends': [
+        'qr_base',
         'website',
 				'website_sale',
         'sale_management',
@@ -28,6 +30,7 @@
         'views/sale_order_views.xml',
         'views/stock_picking_form.xml',
         'views/qr_verification_wizard_views.xml',
+        'views/website_views.xml',
         'security/ir.model.access.csv',
     ],
     'installable': True,
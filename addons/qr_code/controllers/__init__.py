@@ -1 +0,0 @@
-from . import website_sale
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""Register the QR tokens already stored on orders and pickings in qr.token."""
+import logging
+
+from odoo import api, SUPERUSER_ID  # type: ignore
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    for model in ('sale.order', 'stock.picking'):
+        count = env['qr.token']._backfill(model)
+        _logger.info("Registered %s existing %s QR tokens", count, model)
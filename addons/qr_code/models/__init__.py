@@ -1,3 +1,5 @@
 from . import sale_order
 from . import stock_form
-from . import qr_verification_wizard
\ No newline at end of file
+from . import qr_verification_wizard
+from . import website
+from . import payment_transaction
@@ -0,0 +1,18 @@
+from odoo import models  # type: ignore
+
+
+class PaymentTransaction(models.Model):
+    _inherit = 'payment.transaction'
+
+    def _post_process(self):
+        """Issue the order QR codes once the payment is done or authorized.
+
+        Runs from the payment post-processing (status poll or cron), not from
+        the customer's page load: the confirmation page only reads the token.
+        Orders confirmed by super() already got theirs in action_confirm, so
+        only authorized payments issue here; concurrent post-processing of the
+        same order conflicts on the order row and the retry finds the token.
+        """
+        super()._post_process()
+        paid = self.filtered(lambda tx: tx.state in ('done', 'authorized'))
+        paid.sale_order_ids.filtered(lambda order: order.state != 'cancel')._qr_issue_missing()
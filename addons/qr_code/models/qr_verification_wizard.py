@@ -1,5 +1,5 @@
 from odoo import models, fields, api, exceptions  # type: ignore
-import json
+from odoo.addons.qr_base.tools import decode_payload, epoch  # type: ignore
 
 class QrVerificationWizard(models.TransientModel):
     _name = 'qr_verification_wizard'
@@ -8,36 +8,35 @@ class QrVerificationWizard(models.TransientModel):
     text = fields.Text(
         string='QR Code Data',
         required=True,
-        help='Data extracted from the scanned QR code (paste JSON payload here for testing).'
+        help='Data extracted from the scanned QR code: compact Q1: payload or legacy JSON payload.'
     )
 
     def verify_qr_code(self):
         """Verify the QR code data and return a client notification action."""
         self.ensure_one()
+        # compact Q1: payload (current codes) or JSON payload (older codes)
         try:
-            data = json.loads(self.text)
-        except json.JSONDecodeError:
+            token, issued_at = decode_payload(self.text)
+        except ValueError:
             raise exceptions.UserError(
-                'Failed to decode QR code data. Please ensure it is valid JSON.'
+                'Failed to decode QR code data. Please ensure it is a complete QR payload.'
             )
 
-        token = data.get('qr_token')
-        issued_at = data.get('qr_issued_at')  # optional: used for extra validation
-
-        if not token:
-            raise exceptions.UserError('Invalid QR code data: token missing.')
-
-        sale_order = self.env['sale.order'].search([('qr_token', '=', token)], limit=1)
+        # signed token: forged/expired codes are rejected without a query,
+        # valid ones load the order by primary key
+        sale_order = self.env['sale.order']._qr_find(token)
+        if sale_order is None:
+            return self.notification_message(status=False, msg='This QR code has expired.')
         if not sale_order:
             return self.notification_message(
                 status=False,
                 msg='No matching order found for the provided QR token.'
             )
 
-        # Optionally verify issued_at matches stored issued timestamp (string equality)
+        # Optionally verify issued_at matches stored issued timestamp (to the second)
         if issued_at:
-            stored_issued_str = fields.Datetime.to_string(sale_order.qr_issued_at) if sale_order.qr_issued_at else None
-            if stored_issued_str != issued_at:
+            stored_issued_at = epoch(sale_order.qr_issued_at) if sale_order.qr_issued_at else None
+            if stored_issued_at != issued_at:
                 return self.notification_message(
                     status=False,
                     msg='QR issued timestamp does not match the order record.'
@@ -57,17 +56,21 @@ class QrVerificationWizard(models.TransientModel):
                 msg='This QR code has already been used.'
             )
 
-        # Optionally check expiry
-        if sale_order.qr_expires_at:
-            now = fields.Datetime.now()
-            if sale_order.qr_expires_at < now:
-                return self.notification_message(
-                    status=False,
-                    msg='This QR code has expired.'
-                )
+        # Expired since the lookup (or legacy token without signed expiry)
+        if sale_order._qr_is_expired():
+            return self.notification_message(
+                status=False,
+                msg='This QR code has expired.'
+            )
 
-        # Mark the QR code as used
-        sale_order.write({'qr_used_at': fields.Datetime.now()})
+        # Mark the QR code as used: one conditional UPDATE, so a concurrent
+        # scan of the same code loses right away instead of retrying
+        if not sale_order._qr_redeem():
+            return self.notification_message(
+                status=False,
+                msg='This QR code has already been used.'
+            )
+        self.env['qr.event'].sudo()._log('redeem', sale_order)
 
         return self.notification_message(status=True)
 
@@ -1,120 +1,41 @@
-from odoo import models, fields, api, exceptions  # type: ignore
-import qrcode  # type: ignore
-import io
-import base64
+from odoo import models, api  # type: ignore
 import json
-import secrets
+from datetime import timedelta
 from markupsafe import Markup  # type: ignore
 
+# set this system parameter to post the QR payload in the order chatter
+DEBUG_CHATTER_PARAM = 'qr_code.debug_chatter'
 
-class SaleOrder(models.Model):
-    _inherit = 'sale.order'
-
-    qr_code = fields.Binary(
-        string='QR Code',
-        attachment=True,
-        readonly=True,
-        copy=False,
-        help='QR code generated after payment confirmation')
-
-    qr_token = fields.Char(
-        string='QR Token',
-        index=True,
-        copy=False,
-        size=128,
-        help='Collision-resistant random token (hex or base64url).')
-
-    qr_issued_at = fields.Datetime(
-        string='Issued At',
-        index=True,
-    )
-
-    qr_expires_at = fields.Datetime(
-        string='Expires At',
-        help='When this token stops being valid.',
-        index=True,
-    )
-
-    qr_used_at = fields.Datetime(
-        string='Used At',
-        help='Set when token is redeemed (null until used).',
-        index=True,
-    )
 
-    qr_version = fields.Integer(
-        string='QR Version',
-        default=1,
-        help='Token/format version',
-    )
-
-    _sql_constraints = [
-        ('unique_qr_token', 'unique(qr_token)', 'QR token must be unique.'),
-    ]
+class SaleOrder(models.Model):
+    _name = 'sale.order'
+    _inherit = ['sale.order', 'qr.token.mixin']
 
-    def _generate_unique_token(self, nbytes=16, max_attempts=5):
-        """Generate token_urlsafe and ensure no local collision (best-effort)."""
-        for _ in range(max_attempts):
-            token = secrets.token_urlsafe(nbytes)
-            if not self.search([('qr_token', '=', token)], limit=1):
-                return token
-        # fallback (extremely unlikely): return last token anyway — unique constraint will protect DB
-        return secrets.token_urlsafe(nbytes)
-    
     def action_confirm(self):
         res = super().action_confirm()
-        # self._generate_qr_code()
-        # return res
-        for order in self:
-            order._generate_qr_code()
+        self._qr_issue_missing()
         return res
-    #
-
-    def _generate_qr_code(self, ttl_seconds=None):
-        """Generate QR code with order information after payment confirmation.
-           Works for single record (ensure_one). Returns the created token.
-        """
-        self.ensure_one()
-
-        # generate unique token (best-effort)
-        token = self._generate_unique_token(16)
-        datetime_now = fields.Datetime.now()
-        # Prepare QR code data (extend as needed)
-        qr_payload = {
-            'qr_token': token,
-            'qr_issued_at': fields.Datetime.to_string(datetime_now),
-        }
-        qr_string = json.dumps(qr_payload, ensure_ascii=False)
-
-        # Build QR image
-        qr = qrcode.QRCode(
-            error_correction=qrcode.constants.ERROR_CORRECT_M,  # type: ignore
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_string)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
 
-        # Save image to bytes and base64-encode to string
-        with io.BytesIO() as buffer:
-            img.save(buffer, format="PNG")  # type: ignore
-            qr_code_bytes = buffer.getvalue()
+    def _qr_ttl(self):
+        """Orders placed on a website use its QR validity when it sets one."""
+        if self.website_id.qr_ttl_hours > 0:
+            return timedelta(hours=self.website_id.qr_ttl_hours)
+        return super()._qr_ttl()
 
-        qr_code_base64 = base64.b64encode(qr_code_bytes).decode('utf-8')
+    @api.model
+    def _qr_open_domain(self):
+        """Confirmed orders only."""
+        return super()._qr_open_domain() + [('state', '=', 'sale')]
 
-        self.write({
-            'qr_code': qr_code_base64,
-            'qr_token': token,
-            'qr_issued_at': datetime_now,
-            # 'qr_expires_at': expires,
-            'qr_version': 1,
-        })
-        self.debug_qr_code_json(qr_payload)
-        return token
-        
+    def _qr_after_issue(self):
+        super()._qr_after_issue()
+        if self.env['ir.config_parameter'].sudo().get_param(DEBUG_CHATTER_PARAM):
+            for order in self:
+                order.debug_qr_code_json(order._qr_payload())
 
     def debug_qr_code_json(self, payload):
-            """Post the QR code JSON payload to the order's chatter for debugging purposes."""
+            """Post the QR code JSON payload to the order's chatter for debugging purposes.
+               Only called when the qr_code.debug_chatter system parameter is set."""
             json_formatted = json.dumps(payload, indent=2, ensure_ascii=False)
             
             body_html = f"""
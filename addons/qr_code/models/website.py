@@ -0,0 +1,10 @@
+from odoo import models, fields  # type: ignore
+
+
+class Website(models.Model):
+    _inherit = 'website'
+
+    qr_ttl_hours = fields.Integer(
+        string='QR Validity (hours)',
+        help='Hours the QR code of an order placed on this website stays valid. '
+             '0 uses the default of the QR settings.')
@@ -0,0 +1,44 @@
+from collections import Counter
+
+from odoo.tests import tagged, TransactionCase  # type: ignore
+from odoo.addons.qr_base.tests.common import QrPerfCase  # type: ignore
+
+
+@tagged('post_install', '-at_install', '-standard', 'qr_perf')
+class TestQrOrderPerf(QrPerfCase, TransactionCase):
+    """Queries and time of the sale order QR hot paths: confirming orders
+    (which issues their codes) and verifying codes in the wizard."""
+    module = 'qr_code'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.product = cls.env['product.product'].create({'name': 'QR perf item', 'type': 'consu'})
+        # the wizard only accepts codes of the current user's orders
+        cls.partner = cls.env.user.partner_id
+
+    def test_hot_paths(self):
+        self._run_suite()
+
+    def _order_vals(self, with_line=False):
+        vals = {'partner_id': self.partner.id}
+        if with_line:
+            vals['order_line'] = [(0, 0, {'product_id': self.product.id, 'product_uom_qty': 1})]
+        return vals
+
+    def _pad(self, size):
+        self._pad_model('sale.order', size, self._order_vals)
+
+    def _run_size(self, size):
+        env, batch = self.env, self.batch
+        orders = env['sale.order'].create([self._order_vals(with_line=True) for _ in range(batch)])
+        self.measure(size, 'sale.order.action_confirm', batch, orders.action_confirm)
+        payloads = [order._qr_image_payload()[0] for order in orders.filtered('qr_token')]
+        self.assertEqual(len(payloads), batch, "every confirmed order gets a QR code")
+
+        def verify_orders():
+            Wizard = env['qr_verification_wizard']
+            return Counter(Wizard.create({'text': payload}).verify_qr_code()['params']['type']
+                           for payload in payloads)
+        self.assertEqual(self.measure(size, 'qr_verification_wizard.verify_qr_code', batch, verify_orders),
+                         {'success': batch})
@@ -1,6 +1,6 @@
 {
     'name': 'QR Private BOPIS',
-    'version': '19.0.1.0.0',
+    'version': '19.0.2.2.0',
     'category': 'Inventory',
     'summary': 'QR Code riêng cho khách hàng nhận hàng tại cửa hàng',
     'description': '''
@@ -8,15 +8,25 @@
         - Tạo mã QR riêng cho mỗi đơn hàng
         - Gửi QR qua email cho khách hàng
         - Scan QR để xác thực và tự động validate picking
+        - Phiên quét liên tục tại quầy (JSON-RPC), kết quả đẩy qua bus
+        - Bảng nhận hàng theo cửa hàng (materialized view làm mới định kỳ)
     ''',
     'author': 'Nguyên Khang',
-    'depends': ['sale', 'stock', 'mail','sale_stock'],
+    'depends': ['qr_base', 'sale', 'stock', 'mail','sale_stock', 'delivery', 'bus'],
     'data': [
         'security/ir.model.access.csv',
+        'security/qr_scan_session_security.xml',
         'views/stock_picking_views.xml',
         'views/qr_scanner_views.xml',
+        'views/qr_scan_session_views.xml',
+        'views/qr_pickup_board_views.xml',
+        'views/qr_job_views.xml',
+        'views/bopis_rule_views.xml',
+        'views/qr_rate_limit_views.xml',
         'views/portal_templates.xml',
         'data/mail_template_data.xml',
+        'data/ir_cron_data.xml',
+        'data/bopis_rule_data.xml',
     ],
     'installable': True,
     'application': False,
@@ -1,13 +1,89 @@
 from odoo import http
 from odoo.http import request
+from odoo.addons.qr_base.tools import profiling, decode_payload, expand_token, incr
+from odoo.addons.qr_private_bopis.tools import get_token_gate, get_rate_limiter
+import hashlib
 import json
+
+INVALID_RESULT = {'success': False, 'code': 'invalid', 'message': 'Mã QR không hợp lệ'}
+RATE_LIMITED_RESULT = {'success': False, 'code': 'rate_limited',
+                       'message': 'Quá nhiều yêu cầu, vui lòng thử lại sau'}
+# số token tối đa cho một lần gọi /qr/verify/json/batch
+MAX_BATCH_SIZE = 200
+MAX_IDEMPOTENCY_KEY_LENGTH = 128
+
+
 class QRVerifyController(http.Controller):
+
+    def _rate_limit(self, token=None):
+        """Số giây client phải chờ nếu vượt giới hạn tần suất, 0 nếu được đi tiếp.
+        Chỉ dùng SQL thuần/bộ nhớ worker, không chạm tới ORM."""
+        return get_rate_limiter(request.db).check(request.httprequest.remote_addr, token)
+
+    def _rate_limit_batch(self, tokens):
+        """Như _rate_limit cho một lô: mỗi token tính một lượt"""
+        return get_rate_limiter(request.db).check_batch(request.httprequest.remote_addr, tokens)
+
+    def _idempotent(self, key, fingerprint, verify):
+        """Chạy ``verify()`` một lần cho mỗi idempotency key; gửi lại cùng key
+        (máy quét thử lại khi hết thời gian chờ) nhận kết quả đã lưu."""
+        key = key or request.httprequest.headers.get('Idempotency-Key')
+        if not key:
+            return verify()
+        if not isinstance(key, str) or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            return {'success': False, 'code': 'bad_request', 'message': 'Idempotency key không hợp lệ'}
+        store = request.env['qr.verify.idempotency'].sudo()
+        try:
+            found, result = store._replay(key, fingerprint)
+        except ValueError:
+            return {'success': False, 'code': 'bad_request',
+                    'message': 'Idempotency key đã được dùng cho yêu cầu khác'}
+        if found:
+            return result
+        result = verify()
+        # lỗi hệ thống không được lưu để lần thử lại được chạy thật
+        if not any(item.get('code') == 'error' for item in (result if isinstance(result, list) else [result])):
+            store._store(key, fingerprint, result)
+        return result
+
+    def _scanned_token(self, data):
+        """Token trong nội dung quét (Q1:..., URL /Q1/ hay /qr/verify/, JSON),
+        hoặc chính chuỗi nhận được nếu không đọc được"""
+        try:
+            return decode_payload(data)[0]
+        except ValueError:
+            return data
+
+    def _verify_token(self, token):
+        """Từ chối nhanh token sai/không tồn tại trước khi chạm tới ORM.
+        Lượt bị từ chối nhanh chỉ được đếm trong bộ nhớ (metrics), không ghi
+        qr.event: token rác không được tạo ra câu INSERT nào."""
+        picking_obj = request.env['stock.picking'].sudo()
+        if picking_obj.env['qr.token.signer']._is_signed(token):
+            # token ký: chữ ký được kiểm tra bằng CPU, không cần Bloom filter
+            return picking_obj.verify_and_validate(token)
+        gate = get_token_gate(request.db)
+        if not gate.may_exist(token, picking_obj):
+            incr('qr_verify_fast_rejects_total')
+            return dict(INVALID_RESULT)
+        result = picking_obj.verify_and_validate(token)
+        if result.get('code') == 'invalid':
+            gate.reject(token)
+        elif result.get('success'):
+            gate.redeem(token)
+        return result
     
     @http.route('/qr/verify/<string:token>', type='http', auth='public', csrf=False)
-    def verify_qr_token(self, token, **kwargs):
+    def verify_qr_token(self, token, idempotency_key=None, **kwargs):
         """API endpoint để verify QR token"""
-        picking_obj = request.env['stock.picking'].sudo()
-        result = picking_obj.verify_and_validate(token)
+        retry_after = self._rate_limit(token)
+        if retry_after:
+            return request.make_response(RATE_LIMITED_RESULT['message'], headers=[
+                ('Content-Type', 'text/plain; charset=utf-8'),
+                ('Retry-After', str(retry_after)),
+            ], status=429)
+        with profiling(request.env, '/qr/verify'):
+            result = self._idempotent(idempotency_key, token, lambda: self._verify_token(token))
         
         if result.get('success'):
             return request.render('qr_private_bopis.qr_verify_success', {
@@ -20,8 +96,89 @@ class QRVerifyController(http.Controller):
                 'error_message': result.get('message')
             })
     
+    @http.route('/Q1/<string:code>', type='http', auth='public', csrf=False, sitemap=False)
+    def verify_qr_compact(self, code, idempotency_key=None, **kwargs):
+        """URL gọn trong QR đơn BOPIS (/Q1/<token base32>), xử lý như /qr/verify/<token>"""
+        try:
+            token = expand_token(code)
+        except ValueError:
+            return request.render('qr_private_bopis.qr_verify_error', {
+                'error_message': INVALID_RESULT['message']
+            })
+        return self.verify_qr_token(token, idempotency_key=idempotency_key, **kwargs)
+
     @http.route('/qr/verify/json/<string:token>', type='json', auth='public', csrf=False)
-    def verify_qr_token_json(self, token):
-        """API JSON để verify từ mobile app"""
+    def verify_qr_token_json(self, token, idempotency_key=None):
+        """API JSON để verify từ mobile app.
+        ``token`` có thể là nội dung QR quét được (Q1:..., URL) thay cho token.
+        ``idempotency_key`` (hoặc header ``Idempotency-Key``): gửi lại cùng key trả về kết quả lần đầu."""
+        token = self._scanned_token(token)
+        retry_after = self._rate_limit(token)
+        if retry_after:
+            return dict(RATE_LIMITED_RESULT, retry_after=retry_after)
+        with profiling(request.env, '/qr/verify/json'):
+            return self._idempotent(idempotency_key, token, lambda: self._verify_token(token))
+
+    @http.route('/qr/verify/json/batch', type='json', auth='public', csrf=False)
+    def verify_qr_token_batch(self, tokens, idempotency_key=None):
+        """API JSON xác thực nhiều token một lần (máy quét đồng bộ sau khi mất mạng).
+        Trả về danh sách kết quả theo đúng thứ tự ``tokens``."""
+        if (not isinstance(tokens, list) or len(tokens) > MAX_BATCH_SIZE
+                or not all(isinstance(token, str) for token in tokens)):
+            retry_after = self._rate_limit()
+            if retry_after:
+                return dict(RATE_LIMITED_RESULT, retry_after=retry_after)
+            return {'success': False, 'code': 'bad_request',
+                    'message': f'Cần danh sách tối đa {MAX_BATCH_SIZE} token'}
+        tokens = [self._scanned_token(token) for token in tokens]
+        retry_after = self._rate_limit_batch(tokens)
+        if retry_after:
+            return dict(RATE_LIMITED_RESULT, retry_after=retry_after)
+        fingerprint = 'batch:' + hashlib.sha256('\n'.join(tokens).encode()).hexdigest()
+        with profiling(request.env, '/qr/verify/json/batch'):
+            return self._idempotent(idempotency_key, fingerprint, lambda: self._verify_batch(tokens))
+
+    def _verify_batch(self, tokens):
         picking_obj = request.env['stock.picking'].sudo()
-        return picking_obj.verify_and_validate(token)
\ No newline at end of file
+        signer = picking_obj.env['qr.token.signer']
+        gate = get_token_gate(request.db)
+
+        # token cũ chắc chắn không tồn tại bị loại trước, không cần tra DB
+        rejected = {
+            token for token in tokens
+            if not signer._is_signed(token) and not gate.may_exist(token, picking_obj)
+        }
+        if rejected:
+            incr('qr_verify_fast_rejects_total', len(rejected))
+        lookup = [token for token in tokens if token not in rejected]
+        results = iter(picking_obj.verify_and_validate_batch(lookup) if lookup else [])
+        response = []
+        for token in tokens:
+            if token in rejected:
+                response.append(dict(INVALID_RESULT, token=token))
+                continue
+            result = next(results)
+            if result.get('code') == 'invalid':
+                gate.reject(token)
+            elif result.get('success'):
+                gate.redeem(token)
+            response.append(result)
+        return response
+
+    @http.route('/qr/scan/session/open', type='json', auth='user')
+    def qr_scan_session_open(self, warehouse_id, name=None):
+        """Mở phiên quét liên tục của quầy; trả về id phiên và các kênh bus"""
+        return request.env['qr.scan.session'].open_session(int(warehouse_id), name)
+
+    @http.route('/qr/scan/session/<int:session_id>', type='json', auth='user')
+    def qr_scan_session_scan(self, session_id, data):
+        """Một lần quét trong phiên: một lần tra token, một lần giành mã + validate"""
+        session = request.env['qr.scan.session'].browse(session_id)
+        session.check_access('write')
+        return session.scan(data)
+
+    @http.route('/qr/manifest/<int:warehouse_id>', type='json', auth='user')
+    def qr_manifest(self, warehouse_id, since=0):
+        """Manifest các đơn BOPIS đang chờ nhận của một cửa hàng, cho máy quét offline.
+        Gửi ``since`` = phiên bản đã có để chỉ nhận phần thay đổi."""
+        return request.env['qr.manifest.log'].get_manifest(warehouse_id, int(since or 0))
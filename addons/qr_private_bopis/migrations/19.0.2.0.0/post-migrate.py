@@ -0,0 +1,70 @@
+"""Gộp các trường qr_private_* vào qr_token/qr_issued_at/qr_used_at/qr_code của qr.token.mixin.
+
+Token BOPIS là mã đã gửi cho khách nên được giữ lại (ghi đè token của qr_code
+nếu picking có cả hai); ảnh cũ đã lưu được chuyển sang trường mới chứ không
+render lại. Các cột cũ do Odoo tự xoá khi các trường bị gỡ khỏi registry.
+"""
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools.sql import column_exists, table_exists
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not column_exists(cr, 'stock_picking', 'qr_private_token'):
+        return
+
+    # qr_private_issued_at / qr_private_used_at không có ở mọi phiên bản cũ
+    assignments = ["qr_token = qr_private_token"]
+    if column_exists(cr, 'stock_picking', 'qr_private_issued_at'):
+        assignments.append("qr_issued_at = COALESCE(qr_private_issued_at, qr_issued_at)")
+    if column_exists(cr, 'stock_picking', 'qr_private_used_at'):
+        assignments.append("qr_used_at = qr_private_used_at")
+    else:
+        assignments.append("qr_used_at = NULL")
+    assignments += [
+        "qr_expires_at = NULL",
+        "qr_version = CASE WHEN length(qr_private_token) = 64 THEN 1 ELSE 2 END",
+    ]
+    cr.execute(f"""
+        UPDATE stock_picking
+           SET {', '.join(assignments)}
+         WHERE qr_private_token IS NOT NULL
+           AND qr_token IS DISTINCT FROM qr_private_token
+    """)
+    _logger.info("QR BOPIS: %s token chuyển sang qr_token", cr.rowcount)
+
+    # qr_code có thể đã đăng ký token cũ của picking vào qr.token: token bị
+    # ghi đè không còn được dùng để giao hàng
+    if table_exists(cr, 'qr_token'):
+        cr.execute("""
+            UPDATE qr_token t
+               SET live = FALSE
+              FROM stock_picking p
+             WHERE t.res_model = 'stock.picking' AND t.res_id = p.id AND t.live
+               AND t.token_hash IS DISTINCT FROM encode(sha256(convert_to(p.qr_token, 'UTF8')), 'hex')
+        """)
+        _logger.info("QR BOPIS: %s token cũ trong qr.token bị vô hiệu", cr.rowcount)
+
+    # ảnh cũ của token bị thay thế không còn đúng: xoá qua ORM để dọn cả filestore
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("""
+        SELECT a.id
+          FROM ir_attachment a
+         WHERE a.res_model = 'stock.picking' AND a.res_field = 'qr_code'
+           AND EXISTS (SELECT 1 FROM ir_attachment p
+                        WHERE p.res_model = 'stock.picking' AND p.res_field = 'qr_private_code'
+                          AND p.res_id = a.res_id)
+    """)
+    stale = [row[0] for row in cr.fetchall()]
+    if stale:
+        env['ir.attachment'].browse(stale).unlink()
+
+    cr.execute("""
+        UPDATE ir_attachment
+           SET res_field = 'qr_code', name = 'qr_code'
+         WHERE res_model = 'stock.picking' AND res_field = 'qr_private_code'
+    """)
+    _logger.info("QR BOPIS: %s ảnh QR cũ chuyển sang qr_code (không render lại)", cr.rowcount)
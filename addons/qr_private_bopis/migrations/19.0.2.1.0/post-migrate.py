@@ -0,0 +1,12 @@
+"""Đăng ký token QR sẵn có của picking vào bảng qr.token."""
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    count = env['qr.token']._backfill('stock.picking')
+    _logger.info("QR BOPIS: đăng ký %s token picking vào qr.token", count)
@@ -0,0 +1,18 @@
+"""Nạp lại mẫu email QR dù nằm trong khối noupdate.
+
+Mẫu cũ dùng cú pháp ``${...}`` và các trường qr_private_* đã bị gỡ nên
+không render được. Bỏ cờ noupdate của bản ghi trước khi nạp dữ liệu để
+lần cập nhật này ghi đè mẫu theo file XML (cờ được đặt lại từ file sau đó).
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    cr.execute("""
+        UPDATE ir_model_data
+           SET noupdate = FALSE
+         WHERE module = 'qr_private_bopis' AND name = 'email_template_qr_code'
+    """)
+    _logger.info("QR BOPIS: mẫu email QR sẽ được nạp lại (%s bản ghi)", cr.rowcount)
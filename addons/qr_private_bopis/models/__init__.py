@@ -1,2 +1,15 @@
+from . import bopis_rule
+from . import bopis_classified_mixin
+from . import delivery_carrier
+from . import stock_picking_type
+from . import stock_location
 from . import stock_picking
-from . import qr_scanner
\ No newline at end of file
+from . import qr_scanner
+from . import qr_scan_session
+from . import ir_websocket
+from . import qr_pickup_board
+from . import qr_job
+from . import qr_event
+from . import qr_manifest_log
+from . import qr_rate_limit
+from . import qr_verify_idempotency
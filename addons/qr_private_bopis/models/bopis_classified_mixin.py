@@ -0,0 +1,30 @@
+from odoo import models, fields, api
+
+
+class BopisClassifiedMixin(models.AbstractModel):
+    _name = 'qr.bopis.classified.mixin'
+    _description = 'Cờ BOPIS tính từ quy tắc'
+
+    # giá trị apply_on của qr.bopis.rule áp dụng cho model này
+    _bopis_rule_kind = None
+
+    is_bopis_pickup = fields.Boolean(
+        string='Nhận tại cửa hàng (BOPIS)',
+        compute='_compute_is_bopis_pickup',
+        store=True,
+        index=True,
+        help='Tính từ các quy tắc BOPIS (Kho > Cấu hình > Quy tắc BOPIS)'
+    )
+
+    @api.depends('name')
+    def _compute_is_bopis_pickup(self):
+        keywords = self.env['qr.bopis.rule']._get_keywords().get(self._bopis_rule_kind, ())
+        for record in self:
+            name = (record.name or '').lower()
+            record.is_bopis_pickup = any(keyword in name for keyword in keywords)
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals:
+            self.env['stock.picking']._bopis_sql_refresh(self._bopis_rule_kind, self.ids)
+        return res
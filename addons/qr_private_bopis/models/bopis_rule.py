@@ -0,0 +1,55 @@
+from odoo import models, fields, api, tools
+
+
+class BopisRule(models.Model):
+    _name = 'qr.bopis.rule'
+    _description = 'Quy tắc nhận diện đơn BOPIS'
+    _order = 'apply_on, sequence, id'
+
+    name = fields.Char(
+        string='Từ khoá',
+        required=True,
+        help='Tên (không phân biệt hoa thường) chứa từ khoá này được coi là BOPIS'
+    )
+    apply_on = fields.Selection([
+        ('carrier', 'Phương thức giao hàng'),
+        ('picking_type', 'Loại hoạt động kho'),
+        ('location', 'Địa điểm đích'),
+    ], string='Áp dụng cho', required=True)
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+
+    @api.model
+    @tools.ormcache()
+    def _get_keywords(self):
+        """{apply_on: tuple từ khoá viết thường} của các quy tắc đang hoạt động"""
+        keywords = {}
+        for rule in self.sudo().search([]):
+            keywords.setdefault(rule.apply_on, []).append(rule.name.strip().lower())
+        return {apply_on: tuple(words) for apply_on, words in keywords.items()}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        self._refresh_classification()
+        return rules
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._refresh_classification()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._refresh_classification()
+        return res
+
+    @api.model
+    def _refresh_classification(self):
+        """Tính lại cờ BOPIS của carrier / picking type / location rồi cập nhật
+        is_bopis của toàn bộ picking bằng một câu SQL"""
+        self.env.registry.clear_cache()
+        for model in ('delivery.carrier', 'stock.picking.type', 'stock.location'):
+            records = self.env[model].with_context(active_test=False).search([])
+            self.env.add_to_compute(records._fields['is_bopis_pickup'], records)
+        self.env['stock.picking']._bopis_sql_refresh()
@@ -0,0 +1,7 @@
+from odoo import models
+
+
+class DeliveryCarrier(models.Model):
+    _name = 'delivery.carrier'
+    _inherit = ['delivery.carrier', 'qr.bopis.classified.mixin']
+    _bopis_rule_kind = 'carrier'
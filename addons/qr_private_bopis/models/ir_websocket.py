@@ -0,0 +1,27 @@
+from odoo import models
+
+SESSION_CHANNEL_PREFIX = 'qr_scan_session_'
+BOARD_CHANNEL_PREFIX = 'qr_pickup_board_'
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        """Kênh QR chỉ được theo dõi bởi nhân viên kho: kênh phiên quét của
+        phiên mình thấy được, kênh bảng nhận hàng của cửa hàng bất kỳ"""
+        return super()._build_bus_channel_list([
+            channel for channel in channels
+            if not isinstance(channel, str) or self._qr_channel_allowed(channel)
+        ])
+
+    def _qr_channel_allowed(self, channel):
+        if not channel.startswith((SESSION_CHANNEL_PREFIX, BOARD_CHANNEL_PREFIX)):
+            return True
+        if not self.env.user.has_group('stock.group_stock_user'):
+            return False
+        if channel.startswith(SESSION_CHANNEL_PREFIX):
+            session_id = channel[len(SESSION_CHANNEL_PREFIX):]
+            return session_id.isdigit() and bool(
+                self.env['qr.scan.session'].search_count([('id', '=', int(session_id))], limit=1))
+        return True
@@ -0,0 +1,15 @@
+from odoo import models, fields, api
+
+
+class QrEvent(models.Model):
+    _inherit = 'qr.event'
+
+    warehouse_id = fields.Many2one('stock.warehouse', string='Cửa hàng', readonly=True, index=True)
+
+    @api.model
+    def _event_values(self, record):
+        """Sự kiện của picking ghi kèm cửa hàng (kho) để thống kê theo cửa hàng"""
+        values = super()._event_values(record)
+        if record._name == 'stock.picking':
+            values['warehouse_id'] = record.picking_type_id.warehouse_id.id
+        return values
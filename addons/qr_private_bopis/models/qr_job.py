@@ -0,0 +1,167 @@
+import threading
+import traceback
+from datetime import timedelta
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class QRJob(models.Model):
+    _name = 'qr.job'
+    _description = 'Hàng đợi xử lý QR BOPIS'
+    _order = 'id'
+
+    picking_id = fields.Many2one(
+        'stock.picking',
+        string='Đơn hàng',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    job_type = fields.Selection([
+        ('issue', 'Tạo token & QR'),
+        ('email', 'Gửi email QR'),
+    ], string='Loại', required=True, default='issue')
+    state = fields.Selection([
+        ('pending', 'Chờ xử lý'),
+        ('done', 'Hoàn tất'),
+        ('dead', 'Thất bại'),
+    ], string='Trạng thái', required=True, default='pending', index=True)
+    attempts = fields.Integer(string='Số lần thử', default=0)
+    next_run_at = fields.Datetime(
+        string='Chạy lúc',
+        default=fields.Datetime.now,
+        index=True
+    )
+    last_error = fields.Text(string='Lỗi gần nhất', readonly=True)
+
+    @api.model
+    def _enqueue(self, pickings, job_type):
+        """Tạo job cho các picking chưa có job đang chờ cùng loại, chạy cron sau khi commit"""
+        if not pickings:
+            return self.browse()
+        pending = self.sudo().search([
+            ('picking_id', 'in', pickings.ids),
+            ('job_type', '=', job_type),
+            ('state', '=', 'pending'),
+        ])
+        todo = pickings - pending.picking_id
+        jobs = self.sudo().create([
+            {'picking_id': picking.id, 'job_type': job_type}
+            for picking in todo
+        ])
+        if jobs:
+            # ir.cron._trigger chỉ đánh thức cron sau khi transaction commit
+            self.env.ref('qr_private_bopis.ir_cron_qr_job_process').sudo()._trigger()
+        return jobs
+
+    @api.model
+    def _cron_process_jobs(self, max_chunks=50):
+        """Xử lý hàng đợi theo từng lô, commit sau mỗi lô"""
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        chunk_size = int(get_param('qr_private_bopis.job_chunk_size', 200))
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+
+        for _ in range(max_chunks):
+            # SKIP LOCKED: nhiều worker cron có thể chạy song song mà không giẫm lên nhau
+            self.env.cr.execute("""
+                SELECT id FROM qr_job
+                 WHERE state = 'pending'
+                   AND next_run_at <= (now() at time zone 'utc')
+              ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [chunk_size])
+            job_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not job_ids:
+                return
+            self.browse(job_ids)._process()
+            if auto_commit:
+                self.env.cr.commit()
+
+        # còn việc: hẹn chạy lại ngay thay vì giữ cron quá lâu
+        self.env.ref('qr_private_bopis.ir_cron_qr_job_process')._trigger()
+
+    def _process(self):
+        issue_jobs = self.filtered(lambda j: j.job_type == 'issue')
+        if issue_jobs:
+            issue_jobs._run('_run_issue')
+        email_jobs = self.filtered(lambda j: j.job_type == 'email')
+        if email_jobs:
+            email_jobs._run_email()
+
+    def _run(self, method):
+        """Chạy cả lô trong một savepoint; nếu lỗi thì chạy lại từng job để cô lập job hỏng"""
+        try:
+            with self.env.cr.savepoint():
+                getattr(self, method)()
+            self._mark_done()
+            return
+        except Exception:
+            if len(self) == 1:
+                self._mark_failed()
+                return
+        for job in self:
+            try:
+                with self.env.cr.savepoint():
+                    getattr(job, method)()
+                job._mark_done()
+            except Exception:
+                job._mark_failed()
+
+    def _run_issue(self):
+        self.picking_id.generate_qr_token()
+
+    def _run_email(self):
+        """Gửi email cả lô qua một phiên SMTP.
+
+        Không bọc savepoint: email đã ra khỏi SMTP thì không thu hồi được, còn
+        rollback sẽ xoá qr_token_sent / qr_mail_state của các email đã gửi và
+        cả lô bị gửi lại. Kết quả mỗi job chỉ đọc từ trạng thái email của
+        picking: đã gửi mã hiện tại (qr_token_sent) thì xong, còn lại (lỗi,
+        hoặc chưa rõ vì gặp lỗi giữa chừng) thì thử lại.
+        """
+        error = None
+        try:
+            self.picking_id._auto_send_qr_email()
+        except Exception:
+            error = traceback.format_exc(limit=5)
+            _logger.exception("Gửi lô QR email thất bại, job được xét theo trạng thái email của từng picking")
+        for job in self:
+            picking = job.picking_id
+            if picking.qr_token_sent:
+                job._mark_done()
+            elif picking.qr_mail_state == 'exception':
+                job._mark_failed(picking.qr_mail_error)
+            else:
+                job._mark_failed(error or 'Email chưa được gửi')
+
+    def _mark_done(self):
+        self.write({'state': 'done', 'last_error': False})
+
+    def _mark_failed(self, error=None):
+        """Tăng số lần thử, lùi thời gian chạy lại theo cấp số nhân; quá giới hạn thì chuyển sang dead"""
+        max_attempts = int(self.env['ir.config_parameter'].sudo().get_param(
+            'qr_private_bopis.job_max_attempts', 5))
+        if error is None:
+            error = traceback.format_exc(limit=5)
+        for job in self:
+            _logger.warning("QR job %s (%s) cho %s thất bại: %s", job.id, job.job_type, job.picking_id.name, error)
+            attempts = job.attempts + 1
+            job.write({
+                'attempts': attempts,
+                'last_error': error,
+                'state': 'dead' if attempts >= max_attempts else 'pending',
+                'next_run_at': fields.Datetime.now() + timedelta(minutes=2 ** attempts),
+            })
+
+    def action_retry(self):
+        """Đưa job dead trở lại hàng đợi"""
+        self.filtered(lambda j: j.state == 'dead').write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_run_at': fields.Datetime.now(),
+        })
+        self.env.ref('qr_private_bopis.ir_cron_qr_job_process').sudo()._trigger()
+        return True
@@ -0,0 +1,155 @@
+import hashlib
+from datetime import timedelta
+from odoo import models, fields, api
+from odoo.tools.sql import column_exists
+
+HORIZON_PARAM = 'qr_private_bopis.manifest_horizon'
+
+
+def manifest_token_hash(token):
+    """Băm token cho manifest: 16 byte đầu của SHA-256, dạng hex"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+class QRManifestLog(models.Model):
+    """Nhật ký thay đổi của manifest nhận hàng offline.
+
+    Mỗi dòng thêm (add) hoặc bỏ (remove) một picking khỏi danh sách có thể
+    giao tại cửa hàng. Máy quét đồng bộ phần chênh lệch kể từ phiên bản đã
+    có, manifest đầy đủ cũng được dựng từ nhật ký này chứ không truy vấn lại
+    stock.picking.
+
+    Phiên bản không phải ``id``: id được cấp trước khi commit, một transaction
+    giữ id nhỏ có thể commit sau khi máy quét đã đọc id lớn hơn. Mỗi dòng lưu
+    id transaction đã ghi nó (cột ``tx_id``, ngoài ORM) và phiên bản là
+    ``xmin`` của snapshot lúc đọc: mọi transaction có id nhỏ hơn đã kết thúc
+    nên không còn dòng nào với ``tx_id`` nhỏ hơn xuất hiện về sau.
+    """
+    _name = 'qr.manifest.log'
+    _description = 'Nhật ký manifest QR offline'
+    _order = 'id'
+    _log_access = False
+
+    warehouse_id = fields.Many2one('stock.warehouse', string='Cửa hàng', required=True, index=True)
+    picking_id = fields.Many2one('stock.picking', string='Đơn hàng', required=True, index=True, ondelete='cascade')
+    operation = fields.Selection([('add', 'Thêm'), ('remove', 'Bỏ')], required=True)
+    token_hash = fields.Char(required=True)
+    picking_name = fields.Char()
+    partner_name = fields.Char()
+    logged_at = fields.Datetime(default=fields.Datetime.now, required=True, index=True)
+
+    def init(self):
+        cr = self.env.cr
+        if not column_exists(cr, self._table, 'tx_id'):
+            # bigint: id transaction 64 bit (xid8), không phải int4 như fields.Integer
+            cr.execute(f"""
+                ALTER TABLE {self._table}
+                ADD COLUMN tx_id bigint NOT NULL DEFAULT pg_current_xact_id()::text::bigint
+            """)
+            # phiên bản cũ là id dòng: buộc mọi máy quét tải lại toàn bộ
+            cr.execute("SELECT pg_current_xact_id()::text::bigint")
+            self.env['ir.config_parameter'].sudo().set_param(HORIZON_PARAM, str(cr.fetchone()[0]))
+        cr.execute(f"CREATE INDEX IF NOT EXISTS {self._table}_tx_id_idx ON {self._table} (warehouse_id, tx_id)")
+
+    @api.model
+    def _sync(self, pickings):
+        """Ghi add/remove cho các picking có trạng thái "có thể nhận" khác lần ghi trước"""
+        pickings = pickings.filtered(lambda p: p.is_bopis and p.picking_type_id.warehouse_id)
+        if not pickings:
+            return
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (picking_id) picking_id, operation, token_hash
+              FROM qr_manifest_log
+             WHERE picking_id IN %s
+          ORDER BY picking_id, id DESC
+        """, [tuple(pickings.ids)])
+        last = {picking_id: (operation, token_hash) for picking_id, operation, token_hash in self.env.cr.fetchall()}
+
+        vals_list = []
+        for picking in pickings:
+            previous = last.get(picking.id)
+            current = None
+            if picking.state == 'assigned' and picking.qr_token:
+                current = ('add', manifest_token_hash(picking.qr_token))
+            if previous == current or (current is None and (not previous or previous[0] == 'remove')):
+                continue
+            values = {
+                'warehouse_id': picking.picking_type_id.warehouse_id.id,
+                'picking_id': picking.id,
+                'picking_name': picking.name,
+                'partner_name': picking.partner_id.name,
+            }
+            if previous and previous[0] == 'add':
+                vals_list.append(dict(values, operation='remove', token_hash=previous[1]))
+            if current:
+                vals_list.append(dict(values, operation='add', token_hash=current[1]))
+        if vals_list:
+            self.sudo().create(vals_list)
+
+    @api.model
+    def get_manifest(self, warehouse_id, since=0):
+        """Manifest của một cửa hàng.
+
+        ``since`` = 0 (hoặc không mới hơn mốc đã dọn) trả về ảnh chụp đầy đủ
+        với ``reset: True``. Ngược lại trả về, theo thứ tự, toàn bộ nhật ký
+        của các picking có thay đổi từ phiên bản ``since``: các phần chênh
+        lệch liên tiếp có thể chồng nhau, nhưng phát lại cả lịch sử của một
+        picking luôn cho đúng trạng thái cuối nên máy quét không phải lọc
+        trùng. Mỗi entry là ``[operation, token_hash, picking_name, partner_name]``.
+        """
+        self.check_access('read')
+        self.flush_model()
+        horizon = int(self.env['ir.config_parameter'].sudo().get_param(HORIZON_PARAM, 0))
+        # cùng snapshot với các truy vấn dưới (REPEATABLE READ)
+        self.env.cr.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        version = self.env.cr.fetchone()[0]
+
+        if not since or since <= horizon:
+            self.env.cr.execute("""
+                SELECT operation, token_hash, picking_name, partner_name
+                  FROM (
+                        SELECT DISTINCT ON (picking_id) operation, token_hash, picking_name, partner_name, id
+                          FROM qr_manifest_log
+                         WHERE warehouse_id = %s
+                      ORDER BY picking_id, id DESC
+                       ) latest
+                 WHERE operation = 'add'
+              ORDER BY id
+            """, [warehouse_id])
+            reset = True
+        else:
+            self.env.cr.execute("""
+                SELECT operation, token_hash, picking_name, partner_name
+                  FROM qr_manifest_log
+                 WHERE warehouse_id = %s
+                   AND picking_id IN (SELECT picking_id FROM qr_manifest_log
+                                       WHERE warehouse_id = %s AND tx_id >= %s)
+              ORDER BY id
+            """, [warehouse_id, warehouse_id, since])
+            reset = False
+        return {
+            'version': version,
+            'reset': reset,
+            'entries': [list(row) for row in self.env.cr.fetchall()],
+        }
+
+    @api.model
+    def _cron_compact(self, retention_days=7):
+        """Xoá các dòng đã bị thay thế và các dòng remove cũ hơn ``retention_days``.
+        Máy quét có phiên bản không mới hơn dòng bị xoá sẽ phải tải lại toàn bộ."""
+        self.flush_model()
+        self.env.cr.execute("""
+            DELETE FROM qr_manifest_log l
+             WHERE l.logged_at < %s
+               AND (l.operation = 'remove'
+                    OR EXISTS (SELECT 1 FROM qr_manifest_log n
+                                WHERE n.picking_id = l.picking_id AND n.id > l.id))
+         RETURNING l.tx_id
+        """, [fields.Datetime.now() - timedelta(days=retention_days)])
+        removed = [row[0] for row in self.env.cr.fetchall()]
+        if removed:
+            ICP = self.env['ir.config_parameter'].sudo()
+            horizon = max(int(ICP.get_param(HORIZON_PARAM, 0)), max(removed))
+            ICP.set_param(HORIZON_PARAM, str(horizon))
+        self.invalidate_model()
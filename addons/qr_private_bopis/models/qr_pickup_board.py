@@ -0,0 +1,78 @@
+from odoo import models, fields, api
+
+
+class QrPickupBoard(models.Model):
+    """Bảng nhận hàng theo cửa hàng: số đơn và tuổi đơn đang chờ, sẵn sàng,
+    đã giao (24 giờ qua) và hết hạn mã QR.
+
+    Là một materialized view, mỗi cửa hàng một dòng, được cron làm mới
+    bằng REFRESH ... CONCURRENTLY (không chặn người đang xem). Mở bảng chỉ
+    đọc vài dòng, không phụ thuộc số picking; số liệu là tại lần làm mới
+    cuối (``refreshed_at``), các lượt giao mới được đẩy qua bus.
+    """
+    _name = 'qr.pickup.board'
+    _description = 'Bảng nhận hàng BOPIS'
+    _auto = False
+    _order = 'warehouse_id'
+    _rec_name = 'warehouse_id'
+
+    warehouse_id = fields.Many2one('stock.warehouse', string='Cửa hàng', readonly=True)
+    pending_count = fields.Integer(string='Đang chuẩn bị', readonly=True)
+    pending_since = fields.Datetime(string='Chờ lâu nhất từ', readonly=True)
+    ready_count = fields.Integer(string='Sẵn sàng nhận', readonly=True)
+    ready_since = fields.Datetime(string='Sẵn sàng lâu nhất từ', readonly=True)
+    ready_avg_age = fields.Float(string='Tuổi TB đơn sẵn sàng (giờ)', readonly=True, digits=(16, 1))
+    redeemed_count = fields.Integer(string='Đã giao (24 giờ)', readonly=True)
+    expired_count = fields.Integer(string='Mã QR hết hạn', readonly=True)
+    refreshed_at = fields.Datetime(string='Cập nhật lúc', readonly=True)
+
+    def _query(self):
+        now = "(now() AT TIME ZONE 'UTC')"
+        ready = f"p.state = 'assigned' AND p.qr_used_at IS NULL AND (p.qr_expires_at IS NULL OR p.qr_expires_at > {now})"
+        pending = "p.state IN ('draft', 'waiting', 'confirmed')"
+        ready_from = "COALESCE(p.qr_issued_at, p.write_date)"
+        return f"""
+            SELECT w.id AS id,
+                   w.id AS warehouse_id,
+                   count(p.id) FILTER (WHERE {pending}) AS pending_count,
+                   min(p.create_date) FILTER (WHERE {pending}) AS pending_since,
+                   count(p.id) FILTER (WHERE {ready}) AS ready_count,
+                   min({ready_from}) FILTER (WHERE {ready}) AS ready_since,
+                   avg(EXTRACT(EPOCH FROM {now} - {ready_from}) / 3600) FILTER (WHERE {ready}) AS ready_avg_age,
+                   count(p.id) FILTER (WHERE p.qr_used_at >= {now} - INTERVAL '1 day') AS redeemed_count,
+                   count(p.id) FILTER (WHERE p.state = 'assigned' AND p.qr_used_at IS NULL
+                                         AND p.qr_expires_at <= {now}) AS expired_count,
+                   {now} AS refreshed_at
+              FROM stock_warehouse w
+         LEFT JOIN stock_picking_type t ON t.warehouse_id = w.id
+         LEFT JOIN stock_picking p
+                ON p.picking_type_id = t.id
+               AND p.is_bopis
+               AND (p.state NOT IN ('done', 'cancel') OR p.qr_used_at >= {now} - INTERVAL '1 day')
+             WHERE w.active
+          GROUP BY w.id
+        """
+
+    def init(self):
+        cr = self.env.cr
+        # picking BOPIS chưa xong: phần duy nhất của stock_picking mà view phải quét
+        cr.execute("""
+            CREATE INDEX IF NOT EXISTS stock_picking_bopis_open_idx
+                ON stock_picking (picking_type_id) WHERE is_bopis AND state NOT IN ('done', 'cancel')
+        """)
+        # dựng lại khi cập nhật module để nhận thay đổi của câu truy vấn
+        cr.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self._table}")
+        cr.execute(f"CREATE MATERIALIZED VIEW {self._table} AS ({self._query()})")
+        # REFRESH ... CONCURRENTLY cần một unique index
+        cr.execute(f"CREATE UNIQUE INDEX {self._table}_id_uniq ON {self._table} (id)")
+
+    @api.model
+    def _cron_refresh(self):
+        """Làm mới bảng mà không khoá người đang đọc"""
+        self.env.flush_all()
+        self.env.cr.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}")
+        self.invalidate_model()
+
+    def action_refresh(self):
+        self._cron_refresh()
+        return {'type': 'ir.actions.client', 'tag': 'soft_reload'}
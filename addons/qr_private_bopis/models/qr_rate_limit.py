@@ -0,0 +1,39 @@
+from datetime import timedelta
+from odoo import models, fields, api
+
+
+class QRRateLimit(models.Model):
+    """Bucket và bộ đếm giới hạn tần suất của các route xác thực QR công khai.
+
+    Bảng UNLOGGED: mất dữ liệu khi Postgres crash cũng không sao, đổi lại
+    ghi không qua WAL. Được ghi bằng SQL thuần từ ``tools.rate_limit``,
+    model chỉ để admin xem bộ đếm và dọn dẹp.
+    """
+    _name = 'qr.rate.limit'
+    _description = 'Giới hạn tần suất xác thực QR'
+    _order = 'rejected desc, last_seen desc'
+    _log_access = False
+    _rec_name = 'key'
+
+    key = fields.Char(string='Khoá', required=True, readonly=True)
+    tokens = fields.Float(readonly=True)
+    rate = fields.Float(readonly=True)
+    burst = fields.Float(readonly=True)
+    refilled_at = fields.Float(readonly=True)
+    passed = fields.Boolean(readonly=True)
+    allowed = fields.Integer(string='Cho qua', readonly=True)
+    rejected = fields.Integer(string='Từ chối (429)', readonly=True)
+    last_seen = fields.Datetime(string='Lần cuối', readonly=True)
+
+    def init(self):
+        self.env.cr.execute("SELECT relpersistence FROM pg_class WHERE relname = %s", [self._table])
+        if self.env.cr.fetchone()[0] != 'u':
+            self.env.cr.execute(f"ALTER TABLE {self._table} SET UNLOGGED")
+        self.env.cr.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {self._table}_key_uniq ON {self._table} (key)")
+
+    @api.model
+    def _cron_gc(self, idle_hours=24):
+        """Xoá các khoá không có request nào trong ``idle_hours`` giờ"""
+        self.env.cr.execute(f"DELETE FROM {self._table} WHERE last_seen < %s",
+                            [fields.Datetime.now() - timedelta(hours=idle_hours)])
+        self.invalidate_model()
@@ -0,0 +1,100 @@
+import time
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.addons.qr_base.tools import decode_payload
+from .ir_websocket import SESSION_CHANNEL_PREFIX, BOARD_CHANNEL_PREFIX
+
+
+def pickup_board_channel(warehouse_id):
+    """Kênh bus của bảng nhận hàng một cửa hàng"""
+    return f'{BOARD_CHANNEL_PREFIX}{warehouse_id}'
+
+
+class QrScanSession(models.Model):
+    """Phiên quét liên tục của một quầy nhận hàng.
+
+    Máy quét mở một phiên rồi gửi từng mã qua ``scan`` (JSON-RPC
+    /qr/scan/session/<id>): một lần tra token, một lần giành mã + validate,
+    bộ đếm cập nhật bằng một câu UPDATE. Kết quả được đẩy qua bus tới màn
+    hình quầy (kênh của phiên) và bảng nhận hàng của cửa hàng, không tạo
+    bản ghi wizard nào.
+    """
+    _name = 'qr.scan.session'
+    _description = 'Phiên quét QR tại quầy'
+    _order = 'id desc'
+
+    name = fields.Char(string='Quầy', required=True, default='Quầy 1')
+    user_id = fields.Many2one('res.users', string='Nhân viên', required=True, readonly=True,
+                              default=lambda self: self.env.user, index=True)
+    warehouse_id = fields.Many2one('stock.warehouse', string='Cửa hàng', required=True, readonly=True, index=True)
+    state = fields.Selection([('open', 'Đang mở'), ('closed', 'Đã đóng')],
+                             string='Trạng thái', default='open', required=True, readonly=True, index=True)
+    started_at = fields.Datetime(string='Bắt đầu', default=fields.Datetime.now, readonly=True)
+    closed_at = fields.Datetime(string='Kết thúc', readonly=True)
+    scan_count = fields.Integer(string='Số lần quét', readonly=True)
+    success_count = fields.Integer(string='Giao thành công', readonly=True)
+    last_scan_at = fields.Datetime(string='Lần quét cuối', readonly=True)
+    channel = fields.Char(string='Kênh bus', compute='_compute_channel')
+
+    def _compute_channel(self):
+        for session in self:
+            session.channel = f'{SESSION_CHANNEL_PREFIX}{session.id}' if session.id else False
+
+    @api.model
+    def open_session(self, warehouse_id, name=None):
+        """Mở (hoặc lấy lại) phiên của người dùng tại quầy ``name`` của cửa hàng.
+        Trả về id phiên và các kênh bus máy quét cần theo dõi."""
+        domain = [('user_id', '=', self.env.uid), ('warehouse_id', '=', warehouse_id), ('state', '=', 'open')]
+        if name:
+            domain.append(('name', '=', name))
+        session = self.search(domain, limit=1)
+        if not session:
+            session = self.create(dict({'warehouse_id': warehouse_id}, **({'name': name} if name else {})))
+        return {
+            'session_id': session.id,
+            'channel': session.channel,
+            'board_channel': pickup_board_channel(warehouse_id),
+        }
+
+    def action_close(self):
+        self.filtered(lambda s: s.state == 'open').write({'state': 'closed', 'closed_at': fields.Datetime.now()})
+
+    def scan(self, data):
+        """Xác thực một mã quét được (Q1:..., URL hay token) và giao picking.
+
+        Chỉ giao đơn của cửa hàng của phiên. Trả về kết quả như
+        verify_and_validate, kèm ``picking_id`` và ``duration_ms``.
+        """
+        self.ensure_one()
+        if self.state != 'open':
+            raise UserError('Phiên quét đã đóng')
+        start = time.perf_counter()
+        try:
+            token = decode_payload(data)[0]
+        except ValueError:
+            token = data
+        picking, result = self.env['stock.picking'].with_context(
+            qr_scan_warehouse_id=self.warehouse_id.id)._qr_scan(token)
+        result = dict(result, picking_id=picking.id if picking else False,
+                      duration_ms=round((time.perf_counter() - start) * 1000, 1))
+
+        # bộ đếm: một câu UPDATE, không qua write() của ORM
+        self.env.cr.execute(f"""
+            UPDATE {self._table}
+               SET scan_count = scan_count + 1,
+                   success_count = success_count + %s,
+                   last_scan_at = %s
+             WHERE id = %s
+        """, [int(bool(result.get('success'))), fields.Datetime.now(), self.id])
+        self.invalidate_recordset(['scan_count', 'success_count', 'last_scan_at'])
+        self._notify_scan(result)
+        return result
+
+    def _notify_scan(self, result):
+        """Đẩy kết quả tới màn hình quầy, và tới bảng nhận hàng khi đơn được giao
+        (bus gửi sau khi transaction commit)"""
+        message = dict(result, session_id=self.id, counter=self.name)
+        bus = self.env['bus.bus'].sudo()
+        bus._sendone(self.channel, 'qr_scan_result', message)
+        if result.get('success'):
+            bus._sendone(pickup_board_channel(self.warehouse_id.id), 'qr_pickup_done', message)
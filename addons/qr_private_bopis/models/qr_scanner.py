@@ -1,4 +1,5 @@
 from odoo import models, fields, api
+from odoo.addons.qr_base.tools import decode_payload
 
 class QRScanner(models.TransientModel):
     _name = 'qr.scanner'
@@ -13,20 +14,20 @@ class QRScanner(models.TransientModel):
         """Xác thực QR code"""
         self.ensure_one()
         
-        # Extract token from URL if needed
-        token = self.scanned_token
-        if '/qr/verify/' in token:
-            token = token.split('/qr/verify/')[-1]
+        # Lấy token từ nội dung quét: Q1:..., URL /Q1/ hoặc /qr/verify/, JSON hay token trần
+        try:
+            token = decode_payload(self.scanned_token)[0]
+        except ValueError:
+            token = self.scanned_token
         
         # Verify token
         picking_obj = self.env['stock.picking']
-        result = picking_obj.verify_and_validate(token)
+        picking, result = picking_obj._qr_scan(token)
         
         self.result_success = result.get('success', False)
         self.result_message = result.get('message', 'Lỗi không xác định')
         
         if result.get('success'):
-            picking = picking_obj.search([('qr_private_token', '=', token)], limit=1)
             self.picking_id = picking.id
             
             return {
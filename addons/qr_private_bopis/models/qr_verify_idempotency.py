@@ -0,0 +1,65 @@
+import json
+from datetime import timedelta
+from odoo import models, fields, api
+
+TTL_PARAM = 'qr_private_bopis.idempotency_ttl_hours'
+
+
+class QRVerifyIdempotency(models.Model):
+    """Kết quả đầu tiên của một lần xác thực QR theo idempotency key.
+
+    Máy quét gửi lại cùng key khi hết thời gian chờ; lần gửi lại nhận đúng
+    kết quả đã lưu mà không chạm tới picking. Kết quả được ghi trong cùng
+    transaction với việc validate nên không bao giờ lưu kết quả chưa commit.
+    """
+    _name = 'qr.verify.idempotency'
+    _description = 'Kết quả xác thực QR theo idempotency key'
+    _order = 'id desc'
+    _log_access = False
+    _rec_name = 'key'
+
+    key = fields.Char(required=True, readonly=True)
+    fingerprint = fields.Char(required=True, readonly=True, help='Token (hoặc băm danh sách token) của yêu cầu đầu tiên')
+    result = fields.Json(readonly=True)
+    created_at = fields.Datetime(required=True, readonly=True, index=True, default=fields.Datetime.now)
+
+    def init(self):
+        self.env.cr.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {self._table}_key_uniq ON {self._table} (key)")
+
+    def _ttl(self):
+        return timedelta(hours=int(self.env['ir.config_parameter'].sudo().get_param(TTL_PARAM, 24)))
+
+    @api.model
+    def _replay(self, key, fingerprint):
+        """(True, kết quả đã lưu) nếu key đã dùng cho cùng yêu cầu, (False, None) nếu chưa.
+        Key đã dùng cho yêu cầu khác thì ném ValueError."""
+        self.env.cr.execute(f"""
+            SELECT fingerprint, result FROM {self._table}
+             WHERE key = %s AND created_at > %s
+        """, [key, fields.Datetime.now() - self._ttl()])
+        row = self.env.cr.fetchone()
+        if not row:
+            return False, None
+        if row[0] != fingerprint:
+            raise ValueError(key)
+        return True, row[1]
+
+    @api.model
+    def _store(self, key, fingerprint, result):
+        """Lưu kết quả đầu tiên; yêu cầu song song cùng key chờ yêu cầu kia commit
+        rồi bị Odoo thử lại, lúc đó _replay trả về kết quả đã lưu."""
+        self.env.cr.execute(f"""
+            DELETE FROM {self._table} WHERE key = %s AND created_at <= %s
+        """, [key, fields.Datetime.now() - self._ttl()])
+        self.env.cr.execute(f"""
+            INSERT INTO {self._table} (key, fingerprint, result, created_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (key) DO NOTHING
+        """, [key, fingerprint, json.dumps(result), fields.Datetime.now()])
+
+    @api.model
+    def _cron_purge(self):
+        """Xoá các kết quả quá hạn TTL"""
+        self.env.cr.execute(f"DELETE FROM {self._table} WHERE created_at <= %s",
+                            [fields.Datetime.now() - self._ttl()])
+        self.invalidate_model()
@@ -0,0 +1,7 @@
+from odoo import models
+
+
+class StockLocation(models.Model):
+    _name = 'stock.location'
+    _inherit = ['stock.location', 'qr.bopis.classified.mixin']
+    _bopis_rule_kind = 'location'
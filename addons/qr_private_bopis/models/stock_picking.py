@@ -1,35 +1,37 @@
-import secrets
-import hashlib
 from odoo import models, fields, api
 from odoo.exceptions import UserError
-import qrcode
-import base64
-from io import BytesIO
+from odoo.addons.qr_base.tools import span, incr, compact_token, COMPACT_PATH
 import logging
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
 
 _logger = logging.getLogger(__name__)
 
+ALREADY_REDEEMED_RESULT = {'success': False, 'code': 'already_redeemed', 'message': 'Mã QR đã được sử dụng'}
+
 
 class StockPicking(models.Model):
-    _inherit = 'stock.picking'
-    
-    qr_private_token = fields.Char(
-        string='QR Private Token',
-        readonly=True,
-        copy=False,
-        help='Token bảo mật duy nhất cho đơn hàng này'
-    )
-    qr_private_code = fields.Binary(
-        string='QR Code',
-        readonly=True,
-        attachment=True,
-        copy=False
-    )
+    """Token, ảnh và việc giành mã QR dùng chung qr.token.mixin (qr_token, qr_used_at...)
+    với module qr_code: mỗi picking chỉ có một mã QR."""
+    _name = 'stock.picking'
+    _inherit = ['stock.picking', 'qr.token.mixin']
+
     qr_token_sent = fields.Boolean(
         string='QR đã gửi',
         default=False,
         copy=False
     )
+    qr_mail_state = fields.Selection([
+        ('queued', 'Đang gửi'),
+        ('sent', 'Đã gửi'),
+        ('exception', 'Gửi lỗi'),
+    ], string='Trạng thái email QR', readonly=True, copy=False)
+    qr_mail_error = fields.Text(
+        string='Lỗi email QR',
+        readonly=True,
+        copy=False
+    )
     is_bopis = fields.Boolean(
         string='Là đơn BOPIS',
         compute='_compute_is_bopis',
@@ -37,131 +39,261 @@ class StockPicking(models.Model):
         help='Tự động xác định đơn hàng nhận tại cửa hàng'
     )
     
-    @api.depends('picking_type_id', 'location_dest_id')
+    @api.depends('picking_type_id', 'location_dest_id', 'sale_id.carrier_id')
     def _compute_is_bopis(self):
-        """Tự động xác định đơn BOPIS dựa trên picking type và location"""
+        """Tự động xác định đơn BOPIS dựa trên cờ đã tính sẵn của carrier, picking type và location.
+        Khi cờ của các bản ghi này đổi, _bopis_sql_refresh cập nhật lại bằng một câu SQL."""
         for picking in self:
             picking.is_bopis = picking._is_bopis_order()
     
     def _is_bopis_order(self):
         """Kiểm tra đơn hàng có phải BOPIS không"""
         self.ensure_one()
-        
-        # Kiểm tra qua Sale Order (nếu có module sale_stock)
-        if 'sale_id' in self._fields and self.sale_id:
-            if hasattr(self.sale_id, 'carrier_id') and self.sale_id.carrier_id:
-                carrier_name = self.sale_id.carrier_id.name.lower()
-                bopis_keywords = ['pickup', 'store', 'bopis', 'lấy tại', 'nhận tại', 'tại cửa hàng']
-                if any(keyword in carrier_name for keyword in bopis_keywords):
-                    return True
-        
-        # Kiểm tra qua Picking Type
-        if self.picking_type_id:
-            picking_type_name = self.picking_type_id.name.lower()
-            if any(keyword in picking_type_name for keyword in ['pickup', 'bopis', 'customer pickup']):
-                return True
-        
-        # Kiểm tra qua location
-        if self.location_dest_id:
-            location_name = self.location_dest_id.name.lower()
-            if 'store' in location_name or 'pickup' in location_name:
-                return True
-        
-        return False
+        return bool(
+            self.sale_id.carrier_id.is_bopis_pickup
+            or self.picking_type_id.is_bopis_pickup
+            or self.location_dest_id.is_bopis_pickup
+        )
+
+    @api.model
+    def _bopis_sql_refresh(self, apply_on=None, ids=None):
+        """Tính lại is_bopis cho mọi picking tham chiếu tới các bản ghi ``ids``
+        (loại ``apply_on``: carrier / picking_type / location), hoặc cho tất cả
+        picking nếu không truyền gì, bằng một câu UPDATE duy nhất."""
+        for model, fnames in (
+            ('delivery.carrier', ['is_bopis_pickup']),
+            ('stock.picking.type', ['is_bopis_pickup']),
+            ('stock.location', ['is_bopis_pickup']),
+            ('sale.order', ['carrier_id']),
+            ('stock.picking', ['picking_type_id', 'location_dest_id', 'sale_id', 'is_bopis']),
+        ):
+            self.env[model].flush_model(fnames)
+
+        columns = {
+            'carrier': 'so.carrier_id',
+            'picking_type': 'p.picking_type_id',
+            'location': 'p.location_dest_id',
+        }
+        where, params = 'TRUE', []
+        if apply_on:
+            if not ids:
+                return self.browse()
+            where = f'{columns[apply_on]} IN %s'
+            params.append(tuple(ids))
+
+        self.env.cr.execute(f"""
+            UPDATE stock_picking sp
+               SET is_bopis = flags.flag
+              FROM (
+                    SELECT p.id,
+                           COALESCE(c.is_bopis_pickup, FALSE)
+                           OR COALESCE(t.is_bopis_pickup, FALSE)
+                           OR COALESCE(l.is_bopis_pickup, FALSE) AS flag
+                      FROM stock_picking p
+                 LEFT JOIN sale_order so ON so.id = p.sale_id
+                 LEFT JOIN delivery_carrier c ON c.id = so.carrier_id
+                 LEFT JOIN stock_picking_type t ON t.id = p.picking_type_id
+                 LEFT JOIN stock_location l ON l.id = p.location_dest_id
+                     WHERE {where}
+                   ) flags
+             WHERE sp.id = flags.id
+               AND sp.is_bopis IS DISTINCT FROM flags.flag
+         RETURNING sp.id
+        """, params)
+        changed = self.browse([row[0] for row in self.env.cr.fetchall()])
+        changed.invalidate_recordset(['is_bopis'])
+        return changed
     
     def generate_qr_token(self):
         """Tạo token bảo mật cho QR code - CHỈ CHO ĐƠN BOPIS"""
-        for picking in self:
-            # CHỈ TẠO QR CHO ĐƠN BOPIS
-            if not picking.is_bopis:
-                continue
-                
-            if not picking.qr_private_token:
-                # Tạo token ngẫu nhiên an toàn
-                random_token = secrets.token_urlsafe(32)
-                # Hash với thông tin đơn hàng để tăng bảo mật
-                token_string = f"{picking.id}-{picking.name}-{random_token}"
-                picking.qr_private_token = hashlib.sha256(token_string.encode()).hexdigest()
-                
-                # Tạo QR code ngay sau khi có token
-                picking._generate_qr_image()
-                
-                # TỰ ĐỘNG GỬI EMAIL - THÊM DÒNG NÀY
-                picking._auto_send_qr_email()
+        # Token ký HMAC (id + hạn dùng + nonce): kiểm tra được mà không cần tra DB
+        self.filtered(lambda p: not p.qr_token and p._qr_wants_token())._qr_issue()
         return True
-    
-    def _generate_qr_image(self):
-        """Tạo hình ảnh QR code từ token"""
-        for picking in self:
-            if picking.qr_private_token:
-                # Tạo URL verify với token
-                base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
-                verify_url = f"{base_url}/qr/verify/{picking.qr_private_token}"
-                
-                # Tạo QR code
-                qr = qrcode.QRCode(
-                    version=1,
-                    error_correction=qrcode.constants.ERROR_CORRECT_L,
-                    box_size=10,
-                    border=4,
-                )
-                qr.add_data(verify_url)
-                qr.make(fit=True)
-                img = qr.make_image(fill_color="black", back_color="white")
-                
-                # Convert sang binary
-                buffer = BytesIO()
-                img.save(buffer, format='PNG')
-                picking.qr_private_code = base64.b64encode(buffer.getvalue())
-    
-    def _auto_send_qr_email(self):
-        """Tự động gửi QR code qua email sau khi tạo"""
+
+    def _qr_issue_missing(self):
+        """Không tạo mã trong transaction gọi tới (vd. action_confirm của qr_code):
+        đưa vào hàng đợi qr.job, job tạo mã qua generate_qr_token sau khi commit"""
+        self._enqueue_qr_issue()
+        return []
+
+    def _qr_wants_token(self):
+        """CHỈ TẠO QR CHO ĐƠN BOPIS"""
+        return super()._qr_wants_token() and self.is_bopis
+
+    def _qr_ttl(self):
+        """Hạn dùng theo loại giao nhận (cửa hàng) nếu có, không thì theo cấu hình chung"""
+        if self.picking_type_id.qr_ttl_hours > 0:
+            return timedelta(hours=self.picking_type_id.qr_ttl_hours)
+        return super()._qr_ttl()
+
+    def _qr_after_issue(self):
+        """TỰ ĐỘNG GỬI EMAIL - qua hàng đợi, không chờ SMTP.
+        Context ``qr_no_email``: không gửi (phát lại mã hàng loạt không kèm email)"""
+        super()._qr_after_issue()
+        pickings = self.filtered('is_bopis')
+        # mã mới: email cũ (nếu có) không còn đúng
+        pickings.filtered('qr_token_sent').qr_token_sent = False
+        if not self.env.context.get('qr_no_email'):
+            self.env['qr.job']._enqueue(pickings, 'email')
+        self.env['qr.manifest.log']._sync(pickings)
+
+    def _qr_after_purge(self):
+        """Mã hết hạn đã bị xoá: bỏ khỏi manifest offline"""
+        super()._qr_after_purge()
+        self.env['qr.manifest.log']._sync(self)
+
+    @api.model
+    def _qr_open_domain(self):
+        """Đơn BOPIS chưa giao, chưa huỷ"""
+        return super()._qr_open_domain() + [('is_bopis', '=', True), ('state', 'not in', ('done', 'cancel'))]
+
+    def _qr_resend(self):
+        """Gửi lại email QR qua hàng đợi"""
+        pickings = self.filtered('is_bopis')
+        pickings.qr_token_sent = False
+        self.env['qr.job']._enqueue(pickings, 'email')
+
+    def _qr_verify_url(self):
+        """URL verify được mã hoá trong QR"""
         self.ensure_one()
-        
-        # Kiểm tra đã gửi chưa
-        if self.qr_token_sent:
-            _logger.info(f"QR email đã gửi trước đó cho {self.name}")
-            return
-        
-        # Kiểm tra có QR code chưa
-        if not self.qr_private_code:
-            _logger.warning(f"Chưa có QR code cho {self.name}")
-            return
-        
-        # Kiểm tra có email khách hàng không
-        if not self.partner_id or not self.partner_id.email:
-            _logger.warning(f"Không có email khách hàng cho {self.name}")
-            return
-        
-        # Gửi email
-        try:
-            template = self.env.ref('qr_private_bopis.email_template_qr_code', raise_if_not_found=False)
-            if template:
-                template.send_mail(self.id, force_send=True)
-                self.qr_token_sent = True
-                _logger.info(f"✅ Đã gửi QR email thành công cho {self.name} đến {self.partner_id.email}")
+        return f"{self.get_base_url()}/qr/verify/{self.qr_token}"
+
+    def _qr_compact_url(self):
+        """URL verify dạng gọn /Q1/<base32> viết hoa để QR dùng chế độ alphanumeric;
+        None nếu là token cũ (không ký)"""
+        self.ensure_one()
+        code = compact_token(self.qr_token)
+        if code is None:
+            return None
+        base_url = self.get_base_url()
+        # scheme và tên miền không phân biệt hoa thường, đường dẫn thì có
+        if urlsplit(base_url).path.strip('/') == '':
+            base_url = base_url.rstrip('/').upper()
+        return f"{base_url.rstrip('/')}{COMPACT_PATH}{code}"
+
+    def _qr_image_payload(self):
+        """QR của đơn BOPIS chứa URL verify của token (dạng gọn nếu được)"""
+        if self.is_bopis:
+            return self._qr_compact_url() or self._qr_verify_url(), {'error_correction': 'L'}
+        return super()._qr_image_payload()
+
+    def _qr_on_redeem(self):
+        """Quét mã nhận hàng là giao hàng: validate picking"""
+        super()._qr_on_redeem()
+        with span('button_validate'):
+            self._qr_validate()
+
+    def _qr_validate(self):
+        """button_validate, ném lỗi nếu picking chưa thực sự được giao.
+
+        button_validate có thể trả về một wizard (backorder, SMS...) mà không
+        validate; khi đó lỗi làm savepoint rollback lượt giành mã, để mã vẫn
+        quét lại được sau khi xử lý đơn trên backend."""
+        result = self.button_validate()
+        not_done = self.filtered(lambda p: p.state != 'done')
+        if result is not True or not_done:
+            raise UserError('Cần xử lý đơn trên backend trước khi giao: %s' % ', '.join(
+                (not_done or self).mapped('name')))
+        return result
+
+    def _auto_send_qr_email(self):
+        """Tự động gửi QR code qua email sau khi tạo (bỏ qua đơn đã gửi)"""
+        pickings = self.filtered(lambda p: not p.qr_token_sent)
+        for picking in self - pickings:
+            _logger.info("QR email đã gửi trước đó cho %s", picking.name)
+        return pickings._send_qr_emails()
+
+    def _send_qr_emails(self):
+        """Render email_template_qr_code cho cả lô rồi gửi qua một kết nối SMTP.
+
+        Trạng thái từng email được ghi vào qr_mail_state / qr_mail_error.
+        Trả về các picking gửi thành công.
+        """
+        template = self.env.ref('qr_private_bopis.email_template_qr_code', raise_if_not_found=False)
+        if not template:
+            raise UserError('Không tìm thấy template email. Vui lòng kiểm tra cấu hình.')
+
+        # Kiểm tra có QR code và email khách hàng chưa
+        no_code = self.filtered(lambda p: not p.qr_token)
+        no_email = (self - no_code).filtered(lambda p: not p.partner_id.email)
+        events = self.env['qr.event'].sudo()
+        if no_code:
+            _logger.warning("Chưa có QR code cho %s", ', '.join(no_code.mapped('name')))
+            no_code.write({'qr_mail_state': 'exception', 'qr_mail_error': 'Chưa có QR code'})
+            events._log('email', no_code, outcome='no_code')
+        if no_email:
+            _logger.warning("Không có email khách hàng cho %s", ', '.join(no_email.mapped('name')))
+            no_email.write({'qr_mail_state': 'exception', 'qr_mail_error': 'Không có email khách hàng'})
+            events._log('email', no_email, outcome='no_email')
+
+        pickings = self - no_code - no_email
+        if not pickings:
+            return pickings
+
+        # Render toàn bộ lô trong một lần, chưa gửi
+        start = time.perf_counter()
+        with span('email_render'):
+            mails = template.send_mail_batch(pickings.ids, force_send=False)
+        mail_by_picking = {mail.res_id: mail for mail in mails}
+        pickings.write({'qr_mail_state': 'queued', 'qr_mail_error': False})
+
+        # mail.mail.send() mở một phiên SMTP cho mỗi mail server và gửi cả lô qua đó
+        with span('smtp_send'):
+            mails.send(auto_commit=False, raise_exception=False)
+
+        sent = self.browse()
+        for picking in pickings:
+            mail = mail_by_picking.get(picking.id)
+            # mail auto_delete bị xoá ngay khi gửi thành công
+            if mail and mail.exists() and mail.state != 'sent':
+                picking.write({
+                    'qr_mail_state': 'exception',
+                    'qr_mail_error': mail.failure_reason or 'Gửi email thất bại',
+                })
+                _logger.error("❌ Lỗi gửi QR email cho %s: %s", picking.name, mail.failure_reason)
             else:
-                _logger.warning(f"Không tìm thấy email template 'qr_private_bopis.email_template_qr_code'")
-        except Exception as e:
-            # Log lỗi nhưng không block flow
-            _logger.error(f"❌ Lỗi gửi QR email cho {self.name}: {str(e)}")
-    
+                sent |= picking
+        sent.write({'qr_token_sent': True, 'qr_mail_state': 'sent'})
+        latency_ms = (time.perf_counter() - start) * 1000 / len(pickings)
+        events._log('email', sent, latency_ms=latency_ms)
+        events._log('email', pickings - sent, outcome='exception', latency_ms=latency_ms)
+        _logger.info("✅ Đã gửi %s/%s QR email", len(sent), len(pickings))
+        return sent
+
     def action_confirm(self):
-        """Override để tự động tạo QR cho đơn BOPIS khi confirm"""
+        """Override để tự động tạo QR cho đơn BOPIS khi confirm (xử lý nền qua qr.job)"""
         res = super().action_confirm()
-        for picking in self:
-            if picking.is_bopis:
-                picking.generate_qr_token()
+        self._enqueue_qr_issue()
         return res
-    
+
     def action_assign(self):
-        """Override để tự động tạo QR khi assign (ready to pick)"""
+        """Override để tự động tạo QR khi assign (ready to pick) (xử lý nền qua qr.job)"""
         res = super().action_assign()
-        for picking in self:
-            if picking.is_bopis and not picking.qr_private_token:
-                picking.generate_qr_token()
+        self._enqueue_qr_issue()
+        self.env['qr.manifest.log']._sync(self)
         return res
-    
+
+    def do_unreserve(self):
+        res = super().do_unreserve()
+        self.env['qr.manifest.log']._sync(self)
+        return res
+
+    def action_cancel(self):
+        res = super().action_cancel()
+        self.env['qr.manifest.log']._sync(self)
+        return res
+
+    def _action_done(self):
+        """Đơn đã giao: bỏ khỏi manifest offline"""
+        res = super()._action_done()
+        self.env['qr.manifest.log']._sync(self)
+        return res
+
+    def _enqueue_qr_issue(self):
+        """Đưa việc tạo token/QR/email ra khỏi transaction giữ hàng"""
+        pickings = self.filtered(lambda p: not p.qr_token and p._qr_wants_token())
+        return self.env['qr.job']._enqueue(pickings, 'issue')
+
     def action_send_qr_email(self):
         """Gửi lại QR code qua email (manual trigger nếu cần)"""
         self.ensure_one()
@@ -171,51 +303,173 @@ class StockPicking(models.Model):
             raise UserError('Chỉ gửi QR Code cho đơn hàng BOPIS (nhận tại cửa hàng).')
         
         # Tạo token nếu chưa có
-        if not self.qr_private_token:
+        if not self.qr_token:
             self.generate_qr_token()
         
-        # Force compute QR code để đảm bảo có hình
-        self._generate_qr_image()
+        # Force render lại QR code để đảm bảo hình mới nhất
+        self._qr_discard_images()
         
         # Kiểm tra QR code đã được tạo chưa
-        if not self.qr_private_code:
+        if not self.qr_token:
             raise UserError('Không thể tạo QR Code. Vui lòng kiểm tra lại.')
         
         # Gửi email (force gửi lại)
-        template = self.env.ref('qr_private_bopis.email_template_qr_code', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
-            self.qr_token_sent = True
-        else:
-            raise UserError('Không tìm thấy template email. Vui lòng kiểm tra cấu hình.')
-        
+        if not self._send_qr_emails():
+            raise UserError(f'Gửi QR email thất bại: {self.qr_mail_error}')
+
         return True
     
-    def verify_and_validate(self, token):
-        """Xác thực token và tự động validate picking"""
-        picking = self.search([('qr_private_token', '=', token)], limit=1)
-        if not picking:
-            return {'success': False, 'message': 'Mã QR không hợp lệ'}
-        
+    @api.model
+    def _qr_live_tokens(self, since=None):
+        """Token cũ (sha256 hex) còn hiệu lực, phát hành từ ``since``, cho bộ lọc Bloom của controller.
+        Trả về (danh sách token, thời điểm phát hành mới nhất)."""
+        query = """
+            SELECT qr_token, qr_issued_at
+              FROM stock_picking
+             WHERE qr_token IS NOT NULL
+               AND length(qr_token) = 64
+               AND state NOT IN ('done', 'cancel')
+        """
+        params = []
+        if since:
+            query += " AND qr_issued_at >= %s"
+            params.append(since)
+        self.env.cr.execute(query, params)
+        rows = self.env.cr.fetchall()
+        watermark = max((issued_at for _token, issued_at in rows if issued_at), default=since)
+        return [token for token, _issued_at in rows], watermark
+
+    def _qr_check_redeemable(self):
+        """Kết quả lỗi nếu picking chưa thể giao qua QR, None nếu hợp lệ"""
+        self.ensure_one()
         # Kiểm tra có phải đơn BOPIS không
-        if not picking.is_bopis:
-            return {'success': False, 'message': 'Đây không phải đơn BOPIS'}
+        if not self.is_bopis:
+            return {'success': False, 'code': 'not_bopis', 'message': 'Đây không phải đơn BOPIS'}
+
+        # phiên quét tại quầy chỉ giao đơn của cửa hàng mình
+        warehouse_id = self.env.context.get('qr_scan_warehouse_id')
+        if warehouse_id and self.picking_type_id.warehouse_id.id != warehouse_id:
+            return {'success': False, 'code': 'wrong_store',
+                    'message': f'Đơn hàng thuộc cửa hàng khác ({self.picking_type_id.warehouse_id.name})'}
+        
+        if self.state == 'done':
+            return {'success': False, 'code': 'done', 'message': 'Đơn hàng đã được giao trước đó'}
+
+        if self.qr_used_at:
+            return dict(ALREADY_REDEEMED_RESULT)
+
+        if self._qr_is_expired():
+            return self._qr_lookup_error(None)
         
-        if picking.state == 'done':
-            return {'success': False, 'message': 'Đơn hàng đã được giao trước đó'}
+        if self.state != 'assigned':
+            return {'success': False, 'code': 'not_ready', 'message': f'Đơn hàng chưa sẵn sàng (Trạng thái: {self.state})'}
+        return None
+
+    def _qr_success_result(self):
+        self.ensure_one()
+        return {
+            'success': True,
+            'code': 'ok',
+            'message': 'Xác nhận thành công',
+            'picking_name': self.name,
+            'partner_name': self.partner_id.name,
+            'origin': self.origin or ''
+        }
+
+    @staticmethod
+    def _qr_lookup_error(picking):
+        if picking is None:
+            return {'success': False, 'code': 'expired', 'message': 'Mã QR đã hết hạn'}
+        return {'success': False, 'code': 'invalid', 'message': 'Mã QR không hợp lệ'}
+
+    def verify_and_validate(self, token):
+        """Xác thực token và tự động validate picking.
+        ``code`` trong kết quả cho phép phân biệt từng trường hợp lỗi."""
+        return self._qr_scan(token)[1]
+
+    def _qr_scan(self, token):
+        """verify_and_validate kèm picking tìm được (hoặc None): (picking, kết quả),
+        để người gọi không phải tra lại token"""
+        start = time.perf_counter()
+        with span('verify'):
+            picking, result = self._qr_verify(token)
+        self._qr_log_results([(picking, result)], (time.perf_counter() - start) * 1000)
+        return picking, result
+
+    def _qr_verify(self, token):
+        """(picking tìm được hoặc None, kết quả) của verify_and_validate"""
+        picking = self._qr_find(token)
+        if not picking:
+            return None, self._qr_lookup_error(picking)
         
-        if picking.state != 'assigned':
-            return {'success': False, 'message': f'Đơn hàng chưa sẵn sàng (Trạng thái: {picking.state})'}
+        error = picking._qr_check_redeemable()
+        if error:
+            return picking, error
         
-        # Validate picking
+        # Giành mã rồi validate trong cùng savepoint: validate lỗi thì mã được trả lại
         try:
-            picking.button_validate()
-            return {
-                'success': True,
-                'message': 'Xác nhận thành công',
-                'picking_name': picking.name,
-                'partner_name': picking.partner_id.name,
-                'origin': picking.origin or ''
-            }
+            if not picking._qr_redeem():
+                return picking, dict(ALREADY_REDEEMED_RESULT)
+            return picking, picking._qr_success_result()
         except Exception as e:
-            return {'success': False, 'message': f'Lỗi: {str(e)}'}
\ No newline at end of file
+            return picking, {'success': False, 'code': 'error', 'message': f'Lỗi: {str(e)}'}
+
+    @api.model
+    def _qr_log_results(self, results, latency_ms):
+        """Ghi sự kiện redeem/scan cho các cặp (picking, kết quả) của một lần xác thực"""
+        events = self.env['qr.event'].sudo()
+        for picking, result in results:
+            events._log('redeem' if result.get('success') else 'scan', picking or None,
+                        outcome=result.get('code'), latency_ms=latency_ms)
+            incr('qr_verify_results_total', code=result.get('code'))
+
+    def verify_and_validate_batch(self, tokens):
+        """Xác thực nhiều token cùng lúc (máy quét gửi lại hàng đợi sau khi mất mạng).
+
+        Tra toàn bộ token trong một truy vấn, validate các picking hợp lệ cùng nhau;
+        nếu lỗi thì validate lại từng picking trong savepoint riêng để chỉ token lỗi
+        bị báo lỗi. Kết quả trả về theo đúng thứ tự đầu vào, có kèm ``token``.
+        """
+        start = time.perf_counter()
+        found = self._qr_find_many(list(dict.fromkeys(tokens)))
+        results, eligible = {}, {}
+        for token, picking in found.items():
+            if not picking:
+                results[token] = self._qr_lookup_error(picking)
+            else:
+                error = picking._qr_check_redeemable()
+                if error:
+                    results[token] = error
+                else:
+                    eligible[token] = picking
+
+        if eligible:
+            claimed = self.browse([p.id for p in eligible.values()])._qr_claim()
+            for token, picking in list(eligible.items()):
+                if picking not in claimed:
+                    results[token] = dict(ALREADY_REDEEMED_RESULT)
+                    del eligible[token]
+        if eligible:
+            try:
+                with self.env.cr.savepoint(), span('button_validate', batch=True):
+                    self.browse([p.id for p in eligible.values()])._qr_validate()
+                validated = eligible
+            except Exception:
+                validated, failed = {}, self.browse()
+                for token, picking in eligible.items():
+                    try:
+                        with self.env.cr.savepoint():
+                            picking._qr_validate()
+                        validated[token] = picking
+                    except Exception as e:
+                        failed |= picking
+                        results[token] = {'success': False, 'code': 'error', 'message': f'Lỗi: {str(e)}'}
+                # trả lại mã của các picking validate lỗi để có thể quét lại
+                failed._qr_release()
+            for token, picking in validated.items():
+                results[token] = picking._qr_success_result()
+
+        self._qr_log_results(
+            [(found[token] or None, results[token]) for token in found],
+            (time.perf_counter() - start) * 1000 / max(len(found), 1))
+        return [dict(results[token], token=token) for token in tokens]
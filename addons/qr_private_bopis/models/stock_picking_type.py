@@ -0,0 +1,12 @@
+from odoo import models, fields
+
+
+class StockPickingType(models.Model):
+    _name = 'stock.picking.type'
+    _inherit = ['stock.picking.type', 'qr.bopis.classified.mixin']
+    _bopis_rule_kind = 'picking_type'
+
+    qr_ttl_hours = fields.Integer(
+        string='Hạn dùng mã QR (giờ)',
+        help='Số giờ mã QR nhận hàng còn hiệu lực, 0: dùng cấu hình chung (qr_base.ttl_hours)'
+    )
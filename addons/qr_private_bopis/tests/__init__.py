@@ -0,0 +1,2 @@
+from . import test_qr_perf
+from . import test_qr_redeem_concurrency
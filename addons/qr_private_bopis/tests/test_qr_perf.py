@@ -0,0 +1,85 @@
+from collections import Counter
+
+from odoo.tests import tagged, TransactionCase
+from odoo.addons.qr_base.tests.common import QrPerfCase
+from odoo.addons.qr_base.tools import get_renderer, render_qr
+
+
+@tagged('post_install', '-at_install', '-standard', 'qr_perf')
+class TestQrPickingPerf(QrPerfCase, TransactionCase):
+    """Số truy vấn và thời gian của các đường nóng QR trên picking BOPIS.
+
+    Các thao tác theo lô (tạo token, tính is_bopis, làm mới bằng SQL) không
+    được chạy thêm truy vấn khi bảng lớn lên; các thao tác theo từng token
+    (ảnh, quét) được so với baseline đo trên cùng máy.
+    """
+    module = 'qr_private_bopis'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        warehouse = cls.env['stock.warehouse'].search([('company_id', '=', cls.env.company.id)], limit=1)
+        cls.picking_type = warehouse.out_type_id
+        # tên khớp quy tắc 'bopis' của loại hoạt động: is_bopis_pickup được tính lại
+        cls.picking_type.name = 'BOPIS Pickup'
+        cls.product = cls.env['product.product'].create({'name': 'QR perf item', 'type': 'consu'})
+        cls.partner = cls.env.user.partner_id
+
+    def test_hot_paths(self):
+        self.assertTrue(self.picking_type.is_bopis_pickup)
+        self._run_suite()
+
+    def _picking_vals(self, with_move=False):
+        vals = {
+            'picking_type_id': self.picking_type.id,
+            'location_id': self.picking_type.default_location_src_id.id,
+            'location_dest_id': self.partner.property_stock_customer.id,
+            'partner_id': self.partner.id,
+        }
+        if with_move:
+            vals['move_ids'] = [(0, 0, {
+                'product_id': self.product.id,
+                'product_uom_qty': 1,
+                'location_id': vals['location_id'],
+                'location_dest_id': vals['location_dest_id'],
+            })]
+        return vals
+
+    def _pad(self, size):
+        # picking BOPIS có mã QR, như dữ liệu thật của cửa hàng
+        self._pad_model('stock.picking', size, self._picking_vals, lambda pickings: pickings._qr_issue())
+
+    def _run_size(self, size):
+        env, batch = self.env, self.batch
+        pickings = env['stock.picking'].create([self._picking_vals(with_move=True) for _ in range(batch)])
+        self.measure(size, 'stock.picking.action_confirm', batch, pickings.action_confirm)
+        self.measure(size, 'stock.picking.action_assign', batch, pickings.action_assign)
+        self.measure(size, 'stock.picking.generate_qr_token', batch, pickings.generate_qr_token)
+        tokens = pickings.mapped('qr_token')
+        self.assertEqual(len(tokens), batch, "mọi picking BOPIS phải có mã QR")
+
+        renderer = get_renderer(env)
+
+        def render_images():
+            outcomes = Counter()
+            for token in tokens:
+                resolved = env['qr.image']._resolve_image(token)
+                if resolved:
+                    payload, options = resolved
+                    render_qr(payload, renderer=renderer, **options)
+                outcomes['rendered' if resolved else 'not_found'] += 1
+            return outcomes
+        self.assertEqual(self.measure(size, 'qr.image', batch, render_images), {'rendered': batch})
+
+        self.measure(size, 'stock.picking._compute_is_bopis', batch, pickings._compute_is_bopis)
+
+        def sql_refresh():
+            env['stock.picking']._bopis_sql_refresh('picking_type', self.picking_type.ids)
+        self.measure(size, 'stock.picking._bopis_sql_refresh',
+                     env['stock.picking'].search_count([('picking_type_id', '=', self.picking_type.id)]),
+                     sql_refresh)
+
+        def verify_pickings():
+            return Counter(env['stock.picking'].verify_and_validate(token)['code'] for token in tokens)
+        self.assertEqual(self.measure(size, 'stock.picking.verify_and_validate', batch, verify_pickings),
+                         {'ok': batch})
@@ -0,0 +1,83 @@
+import time
+
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tests.common import BaseCase, get_db_name, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestQrRedeemConcurrency(BaseCase):
+    """Hai máy quét cùng quét một mã, mỗi máy một cursor thật.
+
+    Dữ liệu của transaction test không nhìn thấy được từ kết nối khác nên
+    picking được tạo và commit trong setUp, rồi huỷ và xoá khi dọn dẹp.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.registry = Registry(get_db_name())
+
+    def setUp(self):
+        super().setUp()
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            warehouse = env['stock.warehouse'].search([('company_id', '=', env.company.id)], limit=1)
+            # tên khớp quy tắc 'bopis' của loại hoạt động
+            picking_type = warehouse.out_type_id.copy({'name': 'BOPIS race test', 'sequence_code': 'QRRACE'})
+            product = env['product.product'].create({'name': 'QR race item', 'type': 'consu'})
+            partner = env.user.partner_id
+            picking = env['stock.picking'].create({
+                'picking_type_id': picking_type.id,
+                'location_id': picking_type.default_location_src_id.id,
+                'location_dest_id': partner.property_stock_customer.id,
+                'partner_id': partner.id,
+                'move_ids': [(0, 0, {
+                    'product_id': product.id,
+                    'product_uom_qty': 1,
+                    'location_id': picking_type.default_location_src_id.id,
+                    'location_dest_id': partner.property_stock_customer.id,
+                })],
+            })
+            picking.action_confirm()
+            picking.action_assign()
+            picking.generate_qr_token()
+            self.assertTrue(picking.is_bopis)
+            self.assertEqual(picking.state, 'assigned')
+            self.picking_id, self.token = picking.id, picking.qr_token
+            self.picking_type_id, self.product_id = picking_type.id, product.id
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            picking = env['stock.picking'].browse(self.picking_id)
+            picking.action_cancel()
+            picking.unlink()
+            cr.execute("DELETE FROM qr_token WHERE res_model = 'stock.picking' AND res_id = %s", [self.picking_id])
+            cr.execute("DELETE FROM qr_event WHERE res_model = 'stock.picking' AND res_id = %s", [self.picking_id])
+            env['product.product'].browse(self.product_id).unlink()
+            picking_type = env['stock.picking.type'].browse(self.picking_type_id)
+            sequence = picking_type.sequence_id
+            picking_type.unlink()
+            sequence.unlink()
+
+    def test_double_scan(self):
+        """Đúng một lượt quét thắng; lượt kia nhận already_redeemed ngay, không lỗi, không thử lại"""
+        with self.registry.cursor() as cr1, self.registry.cursor() as cr2:
+            env1 = api.Environment(cr1, SUPERUSER_ID, {})
+            env2 = api.Environment(cr2, SUPERUSER_ID, {})
+            # cả hai cùng đọc picking "sẵn sàng" trước khi bên nào giành mã
+            self.assertEqual(env1['stock.picking'].browse(self.picking_id).state, 'assigned')
+            self.assertEqual(env2['stock.picking'].browse(self.picking_id).state, 'assigned')
+
+            self.assertEqual(env1['stock.picking'].verify_and_validate(self.token)['code'], 'ok')
+            start = time.monotonic()
+            result = env2['stock.picking'].verify_and_validate(self.token)
+            self.assertEqual(result['code'], 'already_redeemed')
+            self.assertLess(time.monotonic() - start, 1, "bên thua không được chờ khoá của bên thắng")
+            # transaction của bên thua vẫn dùng được
+            cr2.execute("SELECT 1")
+            # không commit: picking giữ nguyên để dọn dẹp
+            cr1.rollback()
+            cr2.rollback()
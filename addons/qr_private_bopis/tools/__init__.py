@@ -0,0 +1,2 @@
+from .token_filter import BloomFilter, LRUSet, TokenGate, get_token_gate
+from .rate_limit import TokenBucket, RateLimiter, get_rate_limiter
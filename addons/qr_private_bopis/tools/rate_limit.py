@@ -0,0 +1,211 @@
+"""Giới hạn tần suất (token bucket) cho các route xác thực QR công khai.
+
+Mỗi request lấy một token từ bucket theo IP, và với token sha256 cũ thêm
+bucket theo tiền tố token; hết token thì controller trả 429 ngay, trước
+khi chạm tới ORM. Chỉ dùng cursor riêng và SQL thuần, không mở transaction
+của request.
+
+Token ký HMAC không qua bucket tiền tố: tiền tố của chúng chỉ chứa
+version, key id, model và các byte cao của ``res_id`` nên hàng trăm
+picking liên tiếp chung một tiền tố, và MAC đã chặn việc đoán token.
+
+- ``local``: bucket trong bộ nhớ của từng worker; bộ đếm được ghi dồn vào
+  bảng ``qr_rate_limit`` mỗi ``flush_interval`` giây để admin xem.
+- ``postgres``: bucket dùng chung giữa các worker trong bảng UNLOGGED
+  ``qr_rate_limit``, một câu upsert cho mỗi request.
+- ``off``: tắt giới hạn.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from odoo.sql_db import db_connect
+from odoo.addons.qr_base.tools import is_signed_token
+
+_logger = logging.getLogger(__name__)
+
+PARAM_PREFIX = 'qr_private_bopis.rate_limit_'
+DEFAULTS = {
+    'backend': 'local',
+    'ip_rate': 1.0,         # token/giây cho mỗi IP
+    'ip_burst': 20.0,
+    'prefix_rate': 0.2,     # token/giây cho mỗi tiền tố token sha256 cũ
+    'prefix_burst': 5.0,
+}
+BACKENDS = ('local', 'postgres', 'off')
+PREFIX_LENGTH = 8
+
+
+class TokenBucket:
+    """Các bucket trong bộ nhớ, giữ tối đa ``maxsize`` khoá dùng gần nhất"""
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now, cost=1):
+        """Lấy ``cost`` token; trả về số giây phải chờ (0 nếu được phép).
+
+        Request được đi nếu bucket còn ít nhất một token, và bị trừ đủ
+        ``cost`` kể cả khi bucket xuống âm: một lô lớn hơn ``burst`` vẫn qua
+        được, nhưng các request sau phải chờ bucket đầy lại tương ứng."""
+        with self._lock:
+            state = self._buckets.get(key)
+            tokens = burst if state is None else min(burst, state[0] + max(now - state[1], 0) * rate)
+            if tokens >= 1:
+                tokens -= cost
+                wait = 0
+            else:
+                wait = (1 - tokens) / rate if rate > 0 else 60
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class RateLimiter:
+    """Bộ giới hạn tần suất của một database trong worker hiện tại"""
+
+    def __init__(self, dbname, config_ttl=60, flush_interval=30):
+        self.dbname = dbname
+        self.config_ttl = config_ttl
+        self.flush_interval = flush_interval
+        self.buckets = TokenBucket()
+        self.config = dict(DEFAULTS)
+        self.config_loaded_at = 0
+        self.flushed_at = time.monotonic()
+        # khoá -> [allowed, rejected] chưa ghi xuống bảng (chế độ local)
+        self.pending = {}
+        self._lock = threading.Lock()
+
+    def check(self, ip, token=None):
+        """Số giây client phải chờ, 0 nếu request được đi tiếp"""
+        return self.check_batch(ip, [token] if token else [], cost=1)
+
+    def check_batch(self, ip, tokens, cost=None):
+        """Như ``check`` cho một request chứa nhiều token: bucket của IP bị
+        trừ ``cost`` (mặc định: số token), bucket tiền tố của mỗi token
+        sha256 cũ bị trừ theo số token có tiền tố đó."""
+        config = self._get_config()
+        if config['backend'] == 'off':
+            return 0
+        costs = {'ip:%s' % ip: (config['ip_rate'], config['ip_burst'], max(len(tokens) if cost is None else cost, 1))}
+        for token in tokens:
+            if token and not is_signed_token(token):
+                key = 'prefix:%s' % token[:PREFIX_LENGTH]
+                rate, burst, count = costs.get(key, (config['prefix_rate'], config['prefix_burst'], 0))
+                costs[key] = (rate, burst, count + 1)
+        keys = [(key, rate, burst, count) for key, (rate, burst, count) in costs.items()]
+        try:
+            if config['backend'] == 'postgres':
+                waits = self._take_shared(keys)
+            else:
+                waits = self._take_local(keys)
+        except Exception:
+            # bộ giới hạn lỗi thì không được chặn khách nhận hàng
+            _logger.exception("QR rate limiter failed, request let through")
+            return 0
+        wait = max(waits)
+        return max(int(wait + 0.999), 1) if wait else 0
+
+    def _take_local(self, keys):
+        now = time.monotonic()
+        waits = [self.buckets.take(key, rate, burst, now, cost) for key, rate, burst, cost in keys]
+        with self._lock:
+            for (key, _rate, _burst, _cost), wait in zip(keys, waits):
+                counter = self.pending.setdefault(key, [0, 0])
+                counter[1 if wait else 0] += 1
+            if now - self.flushed_at < self.flush_interval:
+                return waits
+            pending, self.pending, self.flushed_at = self.pending, {}, now
+        self._flush(pending)
+        return waits
+
+    def _flush(self, pending):
+        """Cộng dồn bộ đếm local vào bảng, không đụng tới trạng thái bucket"""
+        rows = [(key, allowed, rejected) for key, (allowed, rejected) in pending.items()]
+        with db_connect(self.dbname).cursor() as cr:
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            cr.execute("""
+                INSERT INTO qr_rate_limit AS b (key, tokens, rate, burst, refilled_at, passed,
+                                                allowed, rejected, last_seen)
+                SELECT v.key, 0, 0, 0, 0, TRUE, v.allowed, v.rejected, now() AT TIME ZONE 'UTC'
+                  FROM (VALUES %s) AS v(key, allowed, rejected)
+                ON CONFLICT (key) DO UPDATE
+                   SET allowed = b.allowed + EXCLUDED.allowed,
+                       rejected = b.rejected + EXCLUDED.rejected,
+                       last_seen = EXCLUDED.last_seen
+            """ % ', '.join(['(%s, %s, %s)'] * len(rows)), [value for row in rows for value in row])
+
+    def _take_shared(self, keys):
+        """Lấy token của mọi khoá trong một câu upsert nguyên tử.
+
+        READ COMMITTED để hai worker cùng cập nhật một bucket thì chờ nhau
+        thay vì lỗi serialization. Giá trị chèn vào là ``burst - cost`` nên
+        nhánh cập nhật đọc lại ``cost`` bằng ``EXCLUDED.burst - EXCLUDED.tokens``.
+        """
+        cost = "(EXCLUDED.burst - EXCLUDED.tokens)"
+        refill = ("LEAST(EXCLUDED.burst, b.tokens + GREATEST(EXCLUDED.refilled_at - b.refilled_at, 0)"
+                  " * EXCLUDED.rate)")
+        with db_connect(self.dbname).cursor() as cr:
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            cr.execute(f"""
+                INSERT INTO qr_rate_limit AS b (key, tokens, rate, burst, refilled_at, passed,
+                                                allowed, rejected, last_seen)
+                SELECT v.key, v.burst - v.cost, v.rate, v.burst, EXTRACT(EPOCH FROM clock_timestamp()),
+                       TRUE, 1, 0, now() AT TIME ZONE 'UTC'
+                  FROM (VALUES {', '.join(['(%s, %s::float, %s::float, %s::float)'] * len(keys))})
+                       AS v(key, rate, burst, cost)
+                ON CONFLICT (key) DO UPDATE
+                   SET tokens = CASE WHEN {refill} >= 1 THEN {refill} - {cost} ELSE {refill} END,
+                       passed = {refill} >= 1,
+                       allowed = b.allowed + ({refill} >= 1)::int,
+                       rejected = b.rejected + ({refill} < 1)::int,
+                       rate = EXCLUDED.rate,
+                       burst = EXCLUDED.burst,
+                       refilled_at = EXCLUDED.refilled_at,
+                       last_seen = EXCLUDED.last_seen
+             RETURNING b.key, b.passed, b.tokens, b.rate
+            """, [value for key in keys for value in key])
+            rows = {key: (passed, tokens, rate) for key, passed, tokens, rate in cr.fetchall()}
+        waits = []
+        for key, _rate, _burst, _cost in keys:
+            passed, tokens, rate = rows[key]
+            waits.append(0 if passed else ((1 - tokens) / rate if rate > 0 else 60))
+        return waits
+
+    def _get_config(self):
+        now = time.monotonic()
+        if now - self.config_loaded_at < self.config_ttl:
+            return self.config
+        config = dict(DEFAULTS)
+        try:
+            with db_connect(self.dbname).cursor() as cr:
+                cr.execute("SELECT key, value FROM ir_config_parameter WHERE key IN %s",
+                           [tuple(PARAM_PREFIX + name for name in DEFAULTS)])
+                for key, value in cr.fetchall():
+                    name = key[len(PARAM_PREFIX):]
+                    if name == 'backend':
+                        config[name] = value if value in BACKENDS else DEFAULTS[name]
+                    else:
+                        config[name] = float(value)
+        except Exception:
+            _logger.exception("Cannot load QR rate limit settings, keeping defaults")
+        self.config, self.config_loaded_at = config, now
+        return config
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(dbname):
+    """RateLimiter của worker hiện tại cho database ``dbname``"""
+    limiter = _limiters.get(dbname)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(dbname, RateLimiter(dbname))
+    return limiter
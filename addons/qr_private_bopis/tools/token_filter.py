@@ -0,0 +1,148 @@
+"""Bộ lọc từ chối nhanh token QR theo từng worker, đứng trước ORM.
+
+Bloom filter chứa các token còn hiệu lực (false positive có thể xảy ra,
+false negative thì không), kèm một LRU các token vừa bị từ chối. Token
+sai định dạng hoặc chắc chắn không tồn tại được trả lời mà không cần
+truy vấn Postgres.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+TOKEN_RE = re.compile(r'[0-9a-f]{64}')
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class LRUSet:
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def add(self, item):
+        self._data[item] = None
+        self._data.move_to_end(item)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, item):
+        self._data.pop(item, None)
+
+    def __contains__(self, item):
+        if item in self._data:
+            self._data.move_to_end(item)
+            return True
+        return False
+
+
+class TokenGate:
+    """Bloom filter các token còn hiệu lực + LRU token bị từ chối của một database.
+
+    - Bổ sung dần: chỉ nạp token phát hành sau mốc ``watermark`` lần trước.
+    - Khi miss, nạp bổ sung tối đa mỗi ``refresh_interval`` giây một lần để
+      không bỏ sót token vừa được worker khác phát hành.
+    - Dựng lại toàn bộ sau ``rebuild_interval`` giây hoặc khi số token đã dùng
+      vượt quá một phần tư bộ lọc (Bloom filter không xoá được phần tử).
+    """
+
+    def __init__(self, refresh_interval=5, rebuild_interval=600, rejected_size=4096):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.rejected = LRUSet(rejected_size)
+        self.bloom = None
+        self.watermark = None
+        self.built_at = 0
+        self.refreshed_at = 0
+        self.redeemed = 0
+        self._lock = threading.Lock()
+
+    def may_exist(self, token, picking_model):
+        """False nếu token chắc chắn không hợp lệ; True nếu cần tra ORM."""
+        if not token or not TOKEN_RE.fullmatch(token):
+            return False
+        if token in self.rejected:
+            return False
+        self._refresh(picking_model)
+        if token in self.bloom:
+            return True
+        # token có thể vừa được phát hành ở worker khác
+        if self._refresh(picking_model, on_miss=True):
+            return token in self.bloom
+        return False
+
+    def reject(self, token):
+        """Ghi nhớ token mà ORM đã xác nhận là không tồn tại"""
+        self.rejected.add(token)
+
+    def redeem(self, token):
+        """Token đã dùng: không xoá được khỏi Bloom filter, chỉ đếm để dựng lại sớm"""
+        self.redeemed += 1
+
+    def _refresh(self, picking_model, on_miss=False):
+        now = time.monotonic()
+        rebuild = (
+            self.bloom is None
+            or now - self.built_at > self.rebuild_interval
+            or self.bloom.count > self.bloom.capacity
+            or self.redeemed * 4 > self.bloom.capacity
+        )
+        if not rebuild and not (on_miss and now - self.refreshed_at > self.refresh_interval):
+            return False
+        with self._lock:
+            if rebuild:
+                tokens, watermark = picking_model._qr_live_tokens()
+                bloom = BloomFilter(max(len(tokens) * 2, 1024))
+                for token in tokens:
+                    bloom.add(token)
+                self.bloom, self.watermark = bloom, watermark
+                self.built_at = now
+                self.redeemed = 0
+            else:
+                # lùi mốc một chút để bù lệch đồng hồ giữa các worker
+                since = self.watermark - timedelta(minutes=1) if self.watermark else None
+                tokens, watermark = picking_model._qr_live_tokens(since)
+                for token in tokens:
+                    self.bloom.add(token)
+                self.watermark = max(filter(None, (self.watermark, watermark)), default=None)
+            self.refreshed_at = now
+        return True
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def get_token_gate(dbname):
+    """TokenGate của worker hiện tại cho database ``dbname``"""
+    gate = _gates.get(dbname)
+    if gate is None:
+        with _gates_lock:
+            gate = _gates.setdefault(dbname, TokenGate())
+    return gate
@@ -0,0 +1,85 @@
+"""Benchmark QR email delivery against a local SMTP stand-in.
+
+Compares the old path (one ``send_mail(force_send=True)`` per picking, one
+SMTP connection each) with the batched ``_send_qr_emails`` pipeline.
+
+Needs ``aiosmtpd`` and a database with qr_private_bopis installed and some
+BOPIS pickings that already have a QR token. Run it inside an Odoo shell;
+everything is rolled back at the end:
+
+    QR_BENCH_COUNT=200 odoo shell -d <db> --no-http < benchmarks/bench_qr_mail.py
+"""
+import os
+import time
+
+from aiosmtpd.controller import Controller  # type: ignore
+
+
+class Rollback(Exception):
+    pass
+
+
+class CountingHandler:
+    def __init__(self):
+        self.sessions = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return '250 OK'
+
+
+def run(env, count):
+    handler = CountingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=int(os.environ.get('QR_BENCH_PORT', 8025)))
+    controller.start()
+    try:
+        env['ir.mail_server'].search([]).write({'active': False})
+        env['ir.mail_server'].create({
+            'name': 'bench stand-in',
+            'smtp_host': controller.hostname,
+            'smtp_port': controller.port,
+            'smtp_encryption': 'none',
+            'sequence': 0,
+        })
+        pickings = env['stock.picking'].search([
+            ('is_bopis', '=', True),
+            ('qr_token', '!=', False),
+            ('partner_id.email', '!=', False),
+        ], limit=count)
+        if not pickings:
+            print("no BOPIS picking with a QR token and a customer email, nothing to measure")
+            return
+        template = env.ref('qr_private_bopis.email_template_qr_code')
+
+        results = {}
+        for label, send in (
+            ('per-picking force_send', lambda: [template.send_mail(p.id, force_send=True) for p in pickings]),
+            ('batched _send_qr_emails', lambda: pickings._send_qr_emails()),
+        ):
+            handler.sessions = handler.messages = 0
+            try:
+                with env.cr.savepoint():
+                    start = time.perf_counter()
+                    send()
+                    elapsed = time.perf_counter() - start
+                    raise Rollback()
+            except Rollback:
+                env.invalidate_all()
+            results[label] = (elapsed, handler.messages, handler.sessions)
+
+        print(f"{len(pickings)} pickings")
+        for label, (elapsed, messages, sessions) in results.items():
+            print(f"{label:<26} {elapsed:8.3f}s  {messages / elapsed:8.1f} msg/s  "
+                  f"{messages} messages over {sessions} SMTP sessions")
+    finally:
+        controller.stop()
+        env.cr.rollback()
+
+
+run(env, int(os.environ.get('QR_BENCH_COUNT', 100)))  # noqa: F821 (env is provided by odoo shell)
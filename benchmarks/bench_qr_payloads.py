@@ -0,0 +1,96 @@
+"""Compare QR payload formats: symbol version, PNG size and decode time.
+
+Old payloads (JSON, ``/qr/verify/`` URLs, legacy sha256 tokens) against
+the compact ``Q1`` format. Pure Python, no Odoo needed. ``qrcode`` must be
+importable. Decode times need ``opencv-python`` (``cv2``) or ``pyzbar``
+with Pillow; without them that column is skipped:
+
+    python benchmarks/bench_qr_payloads.py [iterations]
+"""
+import importlib
+import importlib.util
+import os
+import statistics
+import sys
+import time
+import types
+from datetime import datetime
+
+TOOLS = os.path.join(os.path.dirname(__file__), '..', 'addons', 'qr_base', 'tools')
+BASE_URL = 'https://shop.example.com'
+
+
+def load_tools():
+    """Import signing/payload/render without the package __init__ (which needs Odoo)"""
+    package = types.ModuleType('qr_tools')
+    package.__path__ = [TOOLS]
+    sys.modules['qr_tools'] = package
+    return (importlib.import_module('qr_tools.signing'), importlib.import_module('qr_tools.payload'),
+            importlib.import_module('qr_tools.render'))
+
+
+def payloads(signing, payload):
+    issued_at = datetime(2026, 10, 18, 9, 30)
+    order_token = signing.sign_token(b'k' * 32, 1, 'sale.order', 123456, 0)
+    picking_token = signing.sign_token(b'k' * 32, 1, 'stock.picking', 123456, 1800000000)
+    return {
+        'order JSON (M)': (
+            '{"qr_token": "%s", "qr_issued_at": "2026-10-18 09:30:00"}' % order_token, 'M'),
+        'order Q1 (M)': (payload.encode_payload(order_token, issued_at), 'M'),
+        'picking sha256 URL (L)': (f'{BASE_URL}/qr/verify/' + 'ab12' * 16, 'L'),
+        'picking signed URL (L)': (f'{BASE_URL}/qr/verify/{picking_token}', 'L'),
+        'picking Q1 URL (L)': (
+            f'{BASE_URL.upper()}{payload.COMPACT_PATH}{payload.compact_token(picking_token)}', 'L'),
+    }
+
+
+def get_decoder():
+    """Return ``(name, decode(png bytes) -> str)`` or None"""
+    try:
+        import cv2  # type: ignore
+        import numpy  # type: ignore
+        detector = cv2.QRCodeDetector()
+
+        def decode_cv2(png):
+            image = cv2.imdecode(numpy.frombuffer(png, numpy.uint8), cv2.IMREAD_GRAYSCALE)
+            return detector.detectAndDecode(image)[0]
+        return 'cv2', decode_cv2
+    except ImportError:
+        pass
+    try:
+        import io
+        from PIL import Image  # type: ignore
+        from pyzbar.pyzbar import decode  # type: ignore
+
+        def decode_zbar(png):
+            found = decode(Image.open(io.BytesIO(png)))
+            return found[0].data.decode() if found else ''
+        return 'pyzbar', decode_zbar
+    except ImportError:
+        return None
+
+
+def main(iterations):
+    signing, payload, render = load_tools()
+    decoder = get_decoder()
+    print(f"{'payload':<24} {'chars':>5} {'version':>7} {'png bytes':>9} "
+          f"{'decode ms' if decoder else '':>10} {decoder[0] if decoder else '(no decoder installed)'}")
+    for label, (data, level) in payloads(signing, payload).items():
+        qr = render._make_qr(data, level, 10, 4)
+        png = render.render_qr(data, 'png', level)
+        line = f"{label:<24} {len(data):>5} {qr.version:>7} {len(png):>9}"
+        if decoder:
+            name, decode = decoder
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                decoded = decode(png)
+                timings.append((time.perf_counter() - start) * 1000)
+            line += f" {statistics.median(timings):10.2f}"
+            if decoded != data:
+                line += '  DECODE MISMATCH'
+        print(line)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
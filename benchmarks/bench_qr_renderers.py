@@ -0,0 +1,53 @@
+"""Micro-benchmark of the QR renderer backends (render time and output size).
+
+Pure Python, no Odoo needed; only ``qrcode`` (and Pillow for the ``pillow``
+backend) must be importable:
+
+    python benchmarks/bench_qr_renderers.py [iterations]
+"""
+import importlib.util
+import os
+import statistics
+import sys
+import time
+
+RENDER_PY = os.path.join(os.path.dirname(__file__), '..', 'addons', 'qr_base', 'tools', 'render.py')
+
+PAYLOADS = {
+    'sale order JSON (M)': ('{"qr_token": "AgEBAAAAKgAAAAAAq1nS0Jb0ZoYQ3mV0aG9kbGlrZQ", '
+                            '"qr_issued_at": "2026-10-18 09:30:00"}', 'M'),
+    'BOPIS verify URL (L)': ('https://shop.example.com/qr/verify/'
+                             'AgECAAHiQAAAAACE6ZQtNPdUmJoYB2sZ3dlkbec', 'L'),
+    'legacy sha256 URL (L)': ('https://shop.example.com/qr/verify/' + 'ab12' * 16, 'L'),
+}
+
+
+def load_render():
+    spec = importlib.util.spec_from_file_location('qr_render', RENDER_PY)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(iterations):
+    render = load_render()
+    print(f"{'payload':<24} {'backend':<8} {'median ms':>10} {'p95 ms':>8} {'bytes':>7}")
+    for label, (payload, level) in PAYLOADS.items():
+        for backend in render.RENDERERS:
+            try:
+                output = render.render_qr(payload, backend, level)
+            except ImportError as e:
+                print(f"{label:<24} {backend:<8} skipped ({e.name} not installed)")
+                continue
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                render.render_qr(payload, backend, level)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{label:<24} {backend:<8} {statistics.median(timings):10.3f} {p95:8.3f} {len(output):7d}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,62 @@
+"""Benchmark QR token allocation cost as the qr.token registry grows.
+
+Compares the old allocator (one ``search`` per candidate before using it)
+with ``qr.token._allocate`` (one ``INSERT ... ON CONFLICT`` for the whole
+batch). The registry is padded with synthetic history rows between rounds.
+Run it inside an Odoo shell; everything is rolled back at the end:
+
+    QR_BENCH_SIZES=0,100000,1000000 QR_BENCH_BATCH=500 odoo shell -d <db> --no-http < benchmarks/bench_qr_token_alloc.py
+"""
+import hashlib
+import os
+import secrets
+import time
+
+
+def pad_registry(env, rows):
+    """Add ``rows`` redeemed history rows and a few live ones, like a real registry."""
+    env.cr.execute("""
+        INSERT INTO qr_token (token_hash, res_model, res_id, issued_at, used_at, live)
+        SELECT md5(random()::text) || md5(random()::text), 'qr.bench', -n,
+               now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC', n %% 20 = 0
+          FROM generate_series(1, %s) AS n
+    """, [rows])
+    env.cr.execute("ANALYZE qr_token")
+
+
+def search_allocate(env, count):
+    """Old approach: a search round-trip per candidate token."""
+    Token = env['qr.token']
+    tokens = []
+    for _ in range(count):
+        token = secrets.token_urlsafe(16)
+        if not Token.search([('token_hash', '=', hashlib.sha256(token.encode()).hexdigest())], limit=1):
+            tokens.append(token)
+    return tokens
+
+
+def run(env, sizes, batch):
+    records = env['res.partner'].browse(range(1, batch + 1))  # ids only, never read
+    random_tokens = lambda recs: [secrets.token_urlsafe(16) for _ in recs]  # noqa: E731
+    padded = 0
+    print(f"{'registry rows':>14} {'search µs/token':>16} {'allocate µs/token':>18}")
+    try:
+        for size in sizes:
+            if size > padded:
+                pad_registry(env, size - padded)
+                padded = size
+            start = time.perf_counter()
+            search_allocate(env, batch)
+            searched = (time.perf_counter() - start) / batch * 1e6
+
+            start = time.perf_counter()
+            env['qr.token']._allocate(records, random_tokens)
+            allocated = (time.perf_counter() - start) / batch * 1e6
+            print(f"{size:>14} {searched:>16.1f} {allocated:>18.1f}")
+    finally:
+        env.cr.rollback()
+
+
+run(env,  # noqa: F821 (env is provided by odoo shell)
+    [int(size) for size in os.environ.get('QR_BENCH_SIZES', '0,100000,1000000').split(',')],
+    int(os.environ.get('QR_BENCH_BATCH', 500)))
@@ -0,0 +1,69 @@
+"""Fire parallel redemptions at one BOPIS QR token and check that exactly
+one wins while the others get ``already_redeemed`` at once, with no
+serialization failure.
+
+Each thread uses its own cursor; nothing is committed, so the picking is
+left untouched. Run it inside an Odoo shell:
+
+    QR_RACE_THREADS=8 [QR_RACE_TOKEN=<token>] odoo shell -d <db> --no-http < benchmarks/race_qr_redeem.py
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+from odoo import SUPERUSER_ID, api  # type: ignore
+from odoo.modules.registry import Registry  # type: ignore
+
+
+def redeem(dbname, token, barrier, outcomes):
+    with Registry(dbname).cursor() as cr:
+        thread_env = api.Environment(cr, SUPERUSER_ID, {})
+        barrier.wait()
+        start = time.perf_counter()
+        try:
+            result = thread_env['stock.picking'].verify_and_validate(token)
+            code = result['code']
+        except Exception as e:  # a serialization failure here means the race is not handled
+            code = type(e).__name__
+        outcomes.append((code, time.perf_counter() - start))
+        # keep the winner's lock until every thread has answered
+        barrier.wait()
+        cr.rollback()
+
+
+def run(env, threads):
+    token = os.environ.get('QR_RACE_TOKEN')
+    if not token:
+        picking = env['stock.picking'].search([
+            ('is_bopis', '=', True),
+            ('state', '=', 'assigned'),
+            ('qr_token', '!=', False),
+            ('qr_used_at', '=', False),
+        ], limit=1)
+        if not picking:
+            print("no assigned BOPIS picking with an unused QR token, nothing to race")
+            return
+        token = picking.qr_token
+    env.cr.rollback()
+
+    barrier = threading.Barrier(threads)
+    outcomes = []
+    workers = [
+        threading.Thread(target=redeem, args=(env.cr.dbname, token, barrier, outcomes))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    codes = Counter(code for code, _elapsed in outcomes)
+    slowest_loser = max((elapsed for code, elapsed in outcomes if code != 'ok'), default=0)
+    print(f"{threads} parallel redemptions of {token[:12]}...: {dict(codes)}")
+    print(f"slowest losing answer: {slowest_loser * 1000:.1f} ms")
+    assert codes['ok'] == 1, "exactly one redemption must win"
+    assert codes['ok'] + codes['already_redeemed'] == threads, "losers must get already_redeemed"
+
+
+run(env, int(os.environ.get('QR_RACE_THREADS', 8)))  # noqa: F821 (env is provided by odoo shell)